@@ -10,6 +10,10 @@ def create_app():
     app = Flask(__name__)
     app.config['SECRET_KEY'] = SECRET_KEY
     
+    # Serialise responses with the fast JSON encoder (datetimes, models, cached fragments)
+    from app.utils.response import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
     # Initialize CORS
     CORS(app)
     
@@ -25,11 +29,17 @@ def create_app():
     from app.routes.swagger_routes import swagger_bp
     from app.routes.flashcard_routes import flashcard_bp
     from app.routes.research_routes import research_bp
+    from app.routes.metrics_routes import metrics_bp
     app.register_blueprint(exam_bp, url_prefix='/v1')
     app.register_blueprint(question_bp, url_prefix='/v1')
     app.register_blueprint(chat_bp, url_prefix='/v1')
     app.register_blueprint(swagger_bp, url_prefix='/v1')
     app.register_blueprint(flashcard_bp, url_prefix='/v1')
     app.register_blueprint(research_bp, url_prefix='/v1')
+    app.register_blueprint(metrics_bp, url_prefix='/v1')
+    
+    # Compress large responses (gzip or Brotli)
+    from app.utils.compression import compressor
+    compressor.init_app(app)
     
     return app
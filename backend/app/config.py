@@ -14,6 +14,50 @@ FIREBASE_CREDENTIALS = os.getenv('FIREBASE_CREDENTIALS', 'firebase-credentials.j
 
 # Google Gemini API configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+GEMINI_QUESTIONS_PER_CALL = int(os.getenv('GEMINI_QUESTIONS_PER_CALL', 10))  # larger exams are generated in concurrent chunks
 
 # Cache configuration
 CACHE_TIMEOUT = int(os.getenv('CACHE_TIMEOUT', 3600))  # 1 hour by default
+
+# Tutor answer precomputation (max Gemini calls per exam, 0 disables it)
+TUTOR_PRECOMPUTE_BUDGET = int(os.getenv('TUTOR_PRECOMPUTE_BUDGET', 0))
+
+# Semantic answer cache for first-turn tutor chats
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.85))  # 0-1 similarity, above 1 disables it
+SEMANTIC_CACHE_SAMPLE_RATE = float(os.getenv('SEMANTIC_CACHE_SAMPLE_RATE', 0.05))  # share of hits kept for review
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', 50))  # per question
+
+# Adaptive exams: stop once the ability standard error drops below this value
+ADAPTIVE_TARGET_STANDARD_ERROR = float(os.getenv('ADAPTIVE_TARGET_STANDARD_ERROR', 0.3))
+ADAPTIVE_MIN_QUESTIONS = int(os.getenv('ADAPTIVE_MIN_QUESTIONS', 5))
+
+# Question bank used to compose exams from existing questions
+QUESTION_BANK_SYNC_INTERVAL = int(os.getenv('QUESTION_BANK_SYNC_INTERVAL', 60))  # seconds between delta syncs
+QUESTION_BANK_MIN_RATING = float(os.getenv('QUESTION_BANK_MIN_RATING', 2.5))  # skip questions rated below this
+
+# Background sweeper expiring exams past their expires_at
+EXAM_SWEEP_INTERVAL = int(os.getenv('EXAM_SWEEP_INTERVAL', 3600))  # seconds between runs, 0 disables it
+EXAM_SWEEP_PAGE_SIZE = int(os.getenv('EXAM_SWEEP_PAGE_SIZE', 200))
+EXAM_SWEEP_MAX_PAGES = int(os.getenv('EXAM_SWEEP_MAX_PAGES', 50))  # per run
+EXAM_SWEEP_PAGE_DELAY = float(os.getenv('EXAM_SWEEP_PAGE_DELAY', 1.0))  # seconds between pages
+EXAM_SWEEP_ORPHAN_QUESTIONS = os.getenv('EXAM_SWEEP_ORPHAN_QUESTIONS', 'keep')  # keep, archive or delete
+
+# Server-side exam timer: exams still in progress this many seconds after their end time are auto-submitted
+EXAM_AUTO_SUBMIT_GRACE = int(os.getenv('EXAM_AUTO_SUBMIT_GRACE', 60))
+
+# Exam answer autosave: buffered patches are written at most once per interval (seconds)
+AUTOSAVE_FLUSH_INTERVAL = float(os.getenv('AUTOSAVE_FLUSH_INTERVAL', 3))
+
+# Question ratings: counter shards per question and seconds between aggregate roll-ups
+RATING_SHARDS = int(os.getenv('RATING_SHARDS', 10))
+RATING_ROLLUP_INTERVAL = float(os.getenv('RATING_ROLLUP_INTERVAL', 10))
+
+# Conditional GETs: seconds browsers may reuse immutable responses (finished researches) without revalidating
+HTTP_CACHE_IMMUTABLE_MAX_AGE = int(os.getenv('HTTP_CACHE_IMMUTABLE_MAX_AGE', 86400))
+
+# Response compression: smaller bodies are sent uncompressed, precompressed immutable bodies are kept up to this many bytes
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_CACHE_BYTES = int(os.getenv('COMPRESSION_CACHE_BYTES', 32 * 1024 * 1024))
+
+# Serialised question payloads kept for reuse across exam responses
+JSON_FRAGMENT_CACHE_SIZE = int(os.getenv('JSON_FRAGMENT_CACHE_SIZE', 5000))
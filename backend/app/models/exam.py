@@ -1,12 +1,20 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import base64
+import json
 import uuid
 from firebase_admin import firestore
+from app.utils import identity_map
 
 class Exam:
     """Model class for Exam objects"""
     
+    __slots__ = ("id", "user_id", "title", "exam_type", "question_count", "estimated_time", "content_selection",
+                 "question_ids", "answer_key", "adaptive_state", "created_at", "expires_at", "status",
+                 "start_time", "end_time", "user_answers", "saved_answers", "score", "time_spent", "completed_at",
+                 "update_time")
+    
     def __init__(self, user_id, exam_type, question_count, estimated_time, 
-                 content_selection, title=None, question_ids=None, id=None):
+                 content_selection, title=None, question_ids=None, id=None, answer_key=None):
         self.id = id or f"exam_{uuid.uuid4().hex[:8]}"
         self.user_id = user_id
         self.title = title or self._generate_title(exam_type, content_selection)
@@ -15,9 +23,19 @@ class Exam:
         self.estimated_time = estimated_time
         self.content_selection = content_selection
         self.question_ids = question_ids or []
+        self.answer_key = answer_key or []  # Server-only, never sent to the client
+        self.adaptive_state = None  # Ability estimate and responses of adaptive exams
         self.created_at = datetime.utcnow()
         self.expires_at = self.created_at + timedelta(days=30)  # Exams expire after 30 days
         self.status = "generating"  # Initial status
+        self.start_time = None
+        self.end_time = None  # Deadline after which the exam is auto-submitted
+        self.user_answers = []  # Answers submitted
+        self.saved_answers = {}  # Autosaved answers of an exam in progress, question_id -> option
+        self.score = None  # Result fields, set when the exam is submitted
+        self.time_spent = None
+        self.completed_at = None
+        self.update_time = None  # Firestore update time of the loaded document
         
     def _generate_title(self, exam_type, content_selection):
         """Generate a title based on exam type and content selection"""
@@ -25,6 +43,8 @@ class Exam:
             title = "Simulado Completo"
         elif exam_type == "quick":
             title = "Simulado Rápido"
+        elif exam_type == "adaptive":
+            title = "Simulado Adaptativo"
         else:
             title = "Simulado Personalizado"
         
@@ -62,16 +82,70 @@ class Exam:
                 "subject": self.content_selection.get("subject", ""),
                 "custom_topic": self.content_selection.get("customTopic", "")
             },
-            "question_ids": self.question_ids
+            "question_ids": self.question_ids,
+            "answer_key": self.answer_key,
+            "adaptive_state": self.adaptive_state,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "user_answers": self.user_answers,
+            "saved_answers": self.saved_answers,
+            "score": self.score,
+            "time_spent": self.time_spent,
+            "completed_at": self.completed_at
         }
     
-    def to_response_dict(self, include_questions=True):
-        """Convert exam object to API response format"""
+    @staticmethod
+    def build_answer_key(questions):
+        """Build the compact answer key stored with the exam, in question order"""
+        return [
+            {
+                "id": q.id,
+                "answer": q.correct_answer,
+                "subject": q.subject,
+                "topic": q.topic,
+                "difficulty": q.difficulty,
+                "irt": q.irt
+            }
+            for q in questions
+        ]
+    
+    def set_questions(self, questions):
+        """Attach the exam's questions by ID together with their answer key"""
+        self.question_ids = [q.id for q in questions]
+        self.answer_key = self.build_answer_key(questions)
+        return self
+    
+    def add_question(self, question):
+        """Append a question (and its answer key entry) to the exam"""
+        self.question_ids.append(question.id)
+        self.answer_key.extend(self.build_answer_key([question]))
+        return self
+    
+    def get_saved_answers(self):
+        """Autosaved answers in submission format, in question order"""
+        return [
+            {"questionId": question_id, "selectedOption": self.saved_answers[question_id]}
+            for question_id in self.question_ids if question_id in self.saved_answers
+        ]
+    
+    def get_answer_key(self):
+        """Get the answer key, rebuilding it from the questions for old exams"""
+        if not self.answer_key and self.question_ids:
+            from app.models.question import Question
+            self.answer_key = self.build_answer_key(Question.get_by_ids(self.question_ids))
+        return self.answer_key
+    
+    def to_response_dict(self, include_questions=True, questions=None):
+        """Convert exam object to API response format
+        
+        `questions` can pass the already loaded questions (in question_ids
+        order) to avoid fetching them again.
+        """
         response = {
             "id": self.id,
             "title": self.title,
-            "createdAt": self.created_at.isoformat() + "Z",
-            "expiresAt": self.expires_at.isoformat() + "Z",
+            "createdAt": self.created_at,
+            "expiresAt": self.expires_at,
             "status": self.status,
             "config": {
                 "type": self.exam_type,
@@ -85,10 +159,19 @@ class Exam:
         
         if include_questions and self.question_ids:
             # Fetch questions from the questions collection
-            from app.models.question import Question
-            questions = Question.get_by_ids(self.question_ids)
+            if questions is None:
+                from app.models.question import Question
+                questions = Question.get_by_ids(self.question_ids)
             response["questions"] = [q.to_response_dict() for q in questions]
             
+        if self.adaptive_state:
+            response["adaptive"] = {
+                "ability": self.adaptive_state.get("ability"),
+                "standardError": self.adaptive_state.get("standard_error"),
+                "answered": len(self.adaptive_state.get("answers", [])),
+                "finished": self.adaptive_state.get("finished", False)
+            }
+            
         # Add redirect URL for frontend
         response["redirectUrl"] = f"/exam/start/{self.id}"
         
@@ -97,34 +180,44 @@ class Exam:
     @classmethod
     def from_dict(cls, data):
         """Create an Exam object from Firestore data"""
-        config = data.get("config", {})
+        config = data.get("config") or {}
         content_selection = {
             "method": config.get("content_type", "subject"),
             "subject": config.get("subject", ""),
             "customTopic": config.get("custom_topic", "")
         }
         
-        exam = cls(
-            user_id=data.get("user_id"),
-            exam_type=config.get("type"),
-            question_count=config.get("question_count"),
-            estimated_time=config.get("time_limit"),
-            content_selection=content_selection,
-            title=data.get("title"),
-            id=data.get("id")
-        )
-        
-        # Set other attributes from data
-        if "created_at" in data:
-            exam.created_at = data["created_at"]
-        if "expires_at" in data:
-            exam.expires_at = data["expires_at"]
-        if "status" in data:
-            exam.status = data["status"]
-        if "question_ids" in data:
-            exam.question_ids = data["question_ids"]
+        # Fill the slots directly, __init__ would generate a new title and dates
+        get = data.get
+        exam = cls.__new__(cls)
+        exam.id = get("id") or f"exam_{uuid.uuid4().hex[:8]}"
+        exam.user_id = get("user_id")
+        exam.exam_type = config.get("type")
+        exam.question_count = config.get("question_count")
+        exam.estimated_time = config.get("time_limit")
+        exam.content_selection = content_selection
+        exam.title = get("title") or exam._generate_title(exam.exam_type, content_selection)
+        exam.question_ids = get("question_ids") or []
+        exam.answer_key = get("answer_key") or []
+        exam.adaptive_state = get("adaptive_state")
+        exam.created_at = get("created_at") or datetime.utcnow()
+        exam.expires_at = get("expires_at") or exam.created_at + timedelta(days=30)
+        exam.status = get("status") or "generating"
+        exam.user_answers = get("user_answers") or []
+        exam.saved_answers = get("saved_answers") or {}
+        exam.score = get("score")
+        exam.time_spent = get("time_spent")
+        exam.completed_at = get("completed_at")
+        exam.update_time = None
+        # Firestore returns aware datetimes, the timer fields are kept naive UTC
+        for field in ("start_time", "end_time"):
+            value = get(field)
+            if value is not None and value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            setattr(exam, field, value)
+        
         # For backward compatibility with old exams
-        elif "questions" in data:
+        if "question_ids" not in data and "questions" in data:
             from app.models.question import Question
             # If questions are stored as dicts, we need to save them to the questions collection
             # and store their IDs instead
@@ -143,31 +236,37 @@ class Exam:
                 Question.save_batch(questions, data.get("user_id"))
             
             exam.question_ids = question_ids
+            if not exam.answer_key and len(questions) == len(question_ids):
+                exam.answer_key = exam.build_answer_key(questions)
             
         return exam
     
     @staticmethod
     def get_by_id(exam_id, user_id=None):
-        """Retrieve an exam by ID from Firestore"""
-        db = firestore.client()
-        doc_ref = db.collection("exams").document(exam_id)
-        doc = doc_ref.get()
+        """Retrieve an exam by ID from Firestore (read once per request)"""
+        def load_exam():
+            db = firestore.client()
+            doc = db.collection("exams").document(exam_id).get()
+            if not doc.exists:
+                return None
+            exam = Exam.from_dict(doc.to_dict())
+            exam.update_time = doc.update_time
+            return exam
         
-        if not doc.exists:
-            return None
-            
-        exam_data = doc.to_dict()
+        exam = identity_map.load("exams", exam_id, load_exam)
         
         # Check if the exam belongs to the user
-        if user_id and exam_data.get("user_id") != user_id:
+        if exam and user_id and exam.user_id != user_id:
             return None
             
-        return Exam.from_dict(exam_data)
+        return exam
     
     def save(self):
         """Save the exam to Firestore"""
         db = firestore.client()
         db.collection("exams").document(self.id).set(self.to_dict())
+        self.update_time = None
+        identity_map.store("exams", self.id, self)
         return self
     
     def update(self, data):
@@ -177,31 +276,58 @@ class Exam:
         return self.save()
     
     @staticmethod
-    def get_user_exams(user_id, status=None, page=1, limit=10):
-        """Get exams for a specific user with pagination"""
+    def _encode_cursor(exam):
+        """Encode the position after an exam as an opaque pagination cursor"""
+        created_at = exam.created_at.isoformat() if isinstance(exam.created_at, datetime) else exam.created_at
+        payload = json.dumps({"createdAt": created_at, "id": exam.id})
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+    
+    @staticmethod
+    def _decode_cursor(cursor):
+        """Decode a pagination cursor into the values to start after"""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return {
+                "created_at": datetime.fromisoformat(payload["createdAt"]),
+                "id": payload["id"]
+            }
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid pagination cursor: {e}")
+    
+    @staticmethod
+    def get_user_exams(user_id, status=None, page=1, limit=10, cursor=None):
+        """Get exam summaries for a specific user with cursor pagination
+        
+        Pass the `nextCursor` of the previous page as `cursor` to get the next
+        one. `page` without a cursor is still supported for old clients, but it
+        makes Firestore scan the skipped exams.
+        """
         db = firestore.client()
         query = db.collection("exams").where("user_id", "==", user_id)
         
         if status:
             query = query.where("status", "==", status)
-            
-        # Order by creation date (newest first)
-        query = query.order_by("created_at", direction=firestore.Query.DESCENDING)
-        
-        # Calculate pagination
-        offset = (page - 1) * limit
         
-        # Get total count (inefficient in Firestore, but necessary for pagination)
-        total_docs = list(query.stream())
-        total = len(total_docs)
+        # Count with an aggregation query instead of reading every exam
+        total = query.count().get()[0][0].value
         total_pages = (total + limit - 1) // limit
+            
+        # Order by creation date (newest first), with the ID as tie-breaker
+        query = query.order_by("created_at", direction=firestore.Query.DESCENDING)
+        query = query.order_by("id", direction=firestore.Query.DESCENDING)
         
         # Apply pagination
-        query = query.limit(limit).offset(offset)
+        if cursor:
+            query = query.start_after(Exam._decode_cursor(cursor))
+        elif page > 1:
+            query = query.offset((page - 1) * limit)
+        query = query.limit(limit)
         
-        # Execute query
-        results = query.stream()
-        exams = [Exam.from_dict(doc.to_dict()) for doc in results]
+        # Execute query, selecting only the fields shown in the history
+        results = query.select(ExamSummary.PROJECTION).stream()
+        exams = [ExamSummary.from_dict(doc.to_dict()) for doc in results]
+        
+        next_cursor = Exam._encode_cursor(exams[-1]) if len(exams) == limit else None
         
         return {
             "exams": exams,
@@ -209,6 +335,33 @@ class Exam:
                 "total": total,
                 "pages": total_pages,
                 "currentPage": page,
-                "limit": limit
+                "limit": limit,
+                "nextCursor": next_cursor
             }
         }
+
+class ExamSummary:
+    """Exam fields shown in the exam history, read without questions or answers"""
+    
+    __slots__ = ("id", "title", "created_at", "status", "question_count", "score")
+    
+    # Firestore fields selected by history queries
+    PROJECTION = ["id", "title", "created_at", "status", "config", "score"]
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Create an ExamSummary object from projected Firestore data"""
+        config = data.get("config") or {}
+        get = data.get
+        summary = cls.__new__(cls)
+        summary.id = get("id")
+        summary.title = get("title") or Exam._generate_title(None, config.get("type"), {
+            "method": config.get("content_type", "subject"),
+            "subject": config.get("subject", ""),
+            "customTopic": config.get("custom_topic", "")
+        })
+        summary.created_at = get("created_at") or datetime.utcnow()
+        summary.status = get("status") or "generating"
+        summary.question_count = config.get("question_count")
+        summary.score = get("score")
+        return summary
@@ -0,0 +1,108 @@
+class Field:
+    """Mapping of a model attribute to its Firestore and API response keys
+    
+    attr: attribute name (also the Firestore key unless `key` is given)
+    response: key in to_response_dict(), None to leave the attribute out
+    default: value used when the stored value is missing or empty
+    factory: callable building the default when the value is missing (for
+        lists, IDs and timestamps)
+    stored: False for computed attributes written but never read back
+    iso: format the value with isoformat() in API responses
+    """
+    
+    __slots__ = ("attr", "key", "response", "default", "factory", "stored", "iso")
+    
+    def __init__(self, attr, response=None, key=None, default=None, factory=None, stored=True, iso=False):
+        self.attr = attr
+        self.key = key or attr
+        self.response = response
+        self.default = default
+        self.factory = factory
+        self.stored = stored
+        self.iso = iso
+
+def slots(fields, *extra):
+    """__slots__ of a model: its stored fields plus any extra attributes"""
+    return tuple(field.attr for field in fields if field.stored) + extra
+
+def _compile(name, lines, namespace):
+    """Compile generated source and return the function called `name`"""
+    exec(compile("\n".join(lines), f"<{name}>", "exec"), namespace)
+    return namespace[name]
+
+def mapped(fields):
+    """Class decorator generating to_dict, to_response_dict and from_dict
+    
+    The methods are compiled once from the field list into straight-line
+    code: from_dict fills the slots of a bare instance without going through
+    __init__, and the to_* methods build their dict literal directly. A model
+    can define _after_decode(self, data) to finish decoding.
+    """
+    def decorator(cls):
+        namespace = {}
+        
+        decode = ["def from_dict(cls, data):", "    self = cls.__new__(cls)", "    get = data.get"]
+        for i, field in enumerate(fields):
+            if not field.stored:
+                continue
+            if field.factory is not None:
+                namespace[f"factory_{i}"] = field.factory
+                # Keep stored empty lists instead of allocating new ones
+                decode.append(f"    value = get({field.key!r})")
+                decode.append(f"    self.{field.attr} = value if value is not None else factory_{i}()")
+            elif field.default is not None:
+                namespace[f"default_{i}"] = field.default
+                decode.append(f"    self.{field.attr} = get({field.key!r}) or default_{i}")
+            else:
+                decode.append(f"    self.{field.attr} = get({field.key!r})")
+        if hasattr(cls, "_after_decode"):
+            decode.append("    self._after_decode(data)")
+        decode.append("    return self")
+        
+        encode = ["def to_dict(self):", "    return {"]
+        encode += [f"        {field.key!r}: self.{field.attr}," for field in fields]
+        encode.append("    }")
+        
+        respond = ["def to_response_dict(self):", "    return {"]
+        for field in fields:
+            if field.response is None:
+                continue
+            value = f"self.{field.attr}"
+            if field.iso:
+                value = f"{value}.isoformat() if {value} else None"
+            respond.append(f"        {field.response!r}: {value},")
+        respond.append("    }")
+        
+        from_dict = _compile("from_dict", decode, namespace)
+        from_dict.__doc__ = f"Create a {cls.__name__} object from Firestore data"
+        to_dict = _compile("to_dict", encode, namespace)
+        to_dict.__doc__ = f"Convert {cls.__name__.lower()} object to dictionary for Firestore"
+        to_response_dict = _compile("to_response_dict", respond, namespace)
+        to_response_dict.__doc__ = f"Convert {cls.__name__.lower()} object to API response format"
+        
+        cls.from_dict = classmethod(from_dict)
+        cls.to_dict = to_dict
+        if "to_response_dict" not in cls.__dict__:
+            cls.to_response_dict = to_response_dict
+        cls.FIELDS = fields
+        return cls
+    return decorator
+
+def summary_model(name, fields, attrs, base=object):
+    """Build a lightweight read model over a subset of a model's fields
+    
+    List queries select only the summary's PROJECTION from Firestore and
+    decode into the returned slotted class, so list views neither transfer
+    nor decode the large fields that only detail routes need. Computed fields
+    of the full model are read back as stored values.
+    """
+    selected = tuple(
+        Field(field.attr, field.response, field.key, field.default, field.factory, True, field.iso)
+        for field in fields if field.attr in attrs
+    )
+    cls = type(name, (base,), {
+        "__slots__": slots(selected),
+        "__doc__": f"Summary of {', '.join(field.attr for field in selected)} for list views",
+        "PROJECTION": [field.key for field in selected]
+    })
+    return mapped(selected)(cls)
@@ -1,10 +1,33 @@
 import uuid
 from datetime import datetime, timedelta
 from firebase_admin import firestore
+from app.models.fields import Field, mapped, slots, summary_model
+from app.utils import identity_map
 
+# Firestore and API mapping of the flashcard fields, compiled by @mapped
+FLASHCARD_FIELDS = (
+    Field("id", "id", factory=lambda: f"fc_{uuid.uuid4().hex[:8]}"),
+    Field("user_id", "userId"),
+    Field("front", "front"),
+    Field("back", "back"),
+    Field("tags", "tags", factory=list),
+    Field("created_at", "createdAt", factory=datetime.utcnow, iso=True),
+    Field("ease_factor", "easeFactor", default=2.5),
+    Field("interval", "interval", default=0),
+    Field("repetitions", "repetitions", default=0),
+    Field("next_review", "nextReview", factory=datetime.utcnow, iso=True),
+    Field("last_review", "lastReview", iso=True),
+    Field("media_attachments", "mediaAttachments", factory=list),
+    Field("user_notes", "userNotes", default=""),
+    Field("question_id", "questionId")
+)
+
+@mapped(FLASHCARD_FIELDS)
 class Flashcard:
     """Model class for Flashcard objects with spaced repetition algorithm"""
     
+    __slots__ = slots(FLASHCARD_FIELDS)
+    
     def __init__(self, user_id, front, back, tags=None, id=None, ease_factor=2.5, 
                  interval=0, repetitions=0, next_review=None, last_review=None,
                  media_attachments=None, user_notes=None, question_id=None):
@@ -27,82 +50,6 @@ class Flashcard:
         self.user_notes = user_notes or ""
         self.question_id = question_id  # reference to the original question
     
-    def to_dict(self):
-        """Convert flashcard object to dictionary for Firestore"""
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "front": self.front,
-            "back": self.back,
-            "tags": self.tags,
-            "created_at": self.created_at,
-            "ease_factor": self.ease_factor,
-            "interval": self.interval,
-            "repetitions": self.repetitions,
-            "next_review": self.next_review,
-            "last_review": self.last_review,
-            "media_attachments": self.media_attachments,
-            "user_notes": self.user_notes,
-            "question_id": self.question_id
-        }
-    
-    def to_response_dict(self):
-        """Convert flashcard object to API response format"""
-        return {
-            "id": self.id,
-            "userId": self.user_id,
-            "front": self.front,
-            "back": self.back,
-            "tags": self.tags,
-            "createdAt": self.created_at.isoformat() if self.created_at else None,
-            "easeFactor": self.ease_factor,
-            "interval": self.interval,
-            "repetitions": self.repetitions,
-            "nextReview": self.next_review.isoformat() if self.next_review else None,
-            "lastReview": self.last_review.isoformat() if self.last_review else None,
-            "mediaAttachments": self.media_attachments,
-            "userNotes": self.user_notes,
-            "questionId": self.question_id
-        }
-    
-    @classmethod
-    def from_dict(cls, data):
-        """Create a Flashcard object from Firestore data"""
-        # Convert Firestore timestamps to datetime objects
-        # created_at = data.get("created_at")
-        # if isinstance(created_at, firestore.SERVER_TIMESTAMP):
-        #     created_at = datetime.utcnow()
-            
-        # next_review = data.get("next_review")
-        # if isinstance(next_review, str):
-        #     try:
-        #         next_review = datetime.fromisoformat(next_review)
-        #     except ValueError:
-        #         next_review = datetime.utcnow()
-                
-        # last_review = data.get("last_review")
-        # if isinstance(last_review, str) and last_review:
-        #     try:
-        #         last_review = datetime.fromisoformat(last_review)
-        #     except ValueError:
-        #         last_review = None
-        
-        return cls(
-            id=data.get("id"),
-            user_id=data.get("user_id"),
-            front=data.get("front"),
-            back=data.get("back"),
-            tags=data.get("tags", []),
-            ease_factor=data.get("ease_factor", 2.5),
-            interval=data.get("interval", 0),
-            repetitions=data.get("repetitions", 0),
-            next_review=data.get("next_review"),
-            last_review=data.get("last_review"),
-            media_attachments=data.get("media_attachments", []),
-            user_notes=data.get("user_notes", ""),
-            question_id=data.get("question_id")
-        )
-    
     def update_spaced_repetition(self, quality):
         """
         Update flashcard using the SuperMemo-2 spaced repetition algorithm
@@ -152,31 +99,34 @@ class Flashcard:
         db = firestore.client()
         doc_ref = db.collection("flashcards").document(self.id)
         doc_ref.set(self.to_dict())
+        identity_map.store("flashcards", self.id, self)
         return self
     
     @staticmethod
     def get_by_id(flashcard_id):
-        """Retrieve a flashcard by ID from Firestore"""
-        db = firestore.client()
-        doc_ref = db.collection("flashcards").document(flashcard_id)
-        doc = doc_ref.get()
+        """Retrieve a flashcard by ID from Firestore (read once per request)"""
+        def load_flashcard():
+            db = firestore.client()
+            doc = db.collection("flashcards").document(flashcard_id).get()
+            return Flashcard.from_dict(doc.to_dict()) if doc.exists else None
         
-        if not doc.exists:
-            return None
-            
-        return Flashcard.from_dict(doc.to_dict())
+        return identity_map.load("flashcards", flashcard_id, load_flashcard)
     
     @staticmethod
-    def get_by_user_id(user_id, filter_type=None, limit=50):
+    def get_by_user_id(user_id, filter_type=None, limit=50, summary=None):
         """
-        Retrieve flashcards for a specific user
+        Retrieve flashcard summaries for a specific user
         
         filter_type: Optional filter for flashcards
             - "due": Cards due for review today
             - "new": Cards that have never been reviewed
             - "learning": Cards in the learning phase (repetitions < 3)
             - "review": Cards in the review phase (repetitions >= 3)
+        summary: Summary model to select and decode, FlashcardSummary by
+            default. Full flashcards are only read by ID.
+        limit: Maximum number of flashcards, None for all of them
         """
+        summary = summary or FlashcardSummary
         db = firestore.client()
         query = db.collection("flashcards").where("user_id", "==", user_id)
         
@@ -191,11 +141,14 @@ class Flashcard:
         elif filter_type == "review":
             query = query.where("repetitions", ">=", 3)
         
-        # Execute query with limit
-        results = list(query.limit(limit).stream())
+        # Execute query with limit, selecting only the summary fields
+        query = query.select(summary.PROJECTION)
+        if limit is not None:
+            query = query.limit(limit)
+        results = query.stream()
         
-        # Convert to Flashcard objects
-        flashcards = [Flashcard.from_dict(doc.to_dict()) for doc in results]
+        # Convert to summary objects
+        flashcards = [summary.from_dict(doc.to_dict()) for doc in results]
         
         return flashcards
     
@@ -205,4 +158,11 @@ class Flashcard:
         db = firestore.client()
         doc_ref = db.collection("flashcards").document(flashcard_id)
         doc_ref.delete()
+        identity_map.discard("flashcards", flashcard_id)
         return True
+
+# Lightweight flashcard models returned by flashcard lists and statistics
+FlashcardSummary = summary_model(
+    "FlashcardSummary", FLASHCARD_FIELDS, ("id", "front", "back", "tags", "repetitions", "next_review", "user_notes")
+)
+FlashcardReviewState = summary_model("FlashcardReviewState", FLASHCARD_FIELDS, ("repetitions", "next_review"))
@@ -1,11 +1,42 @@
+import random
 import uuid
+from datetime import datetime
 from firebase_admin import firestore
+from app.models.fields import Field, mapped, slots
+from app.utils import identity_map
 
+# Firestore and API mapping of the question fields, compiled by @mapped
+QUESTION_FIELDS = (
+    Field("id", "id", factory=lambda: f"q_{uuid.uuid4().hex[:8]}"),
+    Field("text", "text"),
+    Field("options", "options", factory=list),
+    Field("correct_answer", "correctAnswer"),
+    Field("explanation", "explanation"),
+    Field("subject", "subject"),
+    Field("user_id", "userId"),
+    Field("topic", "topic", default=""),
+    Field("difficulty", "difficulty", default="medium"),
+    Field("ratings", "ratings", factory=list),
+    Field("possible_questions", "possibleQuestions", factory=list),
+    Field("prepared_answers", factory=list),
+    Field("irt"),
+    Field("updated_at"),
+    Field("source", "source"),
+    Field("rating_sum"),
+    Field("rating_count", "ratingCount"),
+    Field("avg_rating", "averageRating", stored=False)
+)
+
+@mapped(QUESTION_FIELDS)
 class Question:
     """Model class for Question objects"""
     
+    __slots__ = slots(QUESTION_FIELDS)
+    
     def __init__(self, text, options, correct_answer, explanation, subject, 
-                 user_id, topic=None, difficulty=None, id=None, ratings=None, possible_questions=None):
+                 user_id, topic=None, difficulty=None, id=None, ratings=None, possible_questions=None,
+                 prepared_answers=None, irt=None, updated_at=None, source=None,
+                 rating_sum=None, rating_count=None):
         self.id = id or f"q_{uuid.uuid4().hex[:8]}"
         self.text = text
         self.options = options
@@ -15,57 +46,34 @@ class Question:
         self.user_id = user_id
         self.topic = topic or ""
         self.difficulty = difficulty or "medium"
-        self.ratings = ratings or []
+        self.ratings = ratings or []  # Legacy ratings list, ratings now live in question_ratings
         self.possible_questions = possible_questions or []
+        self.prepared_answers = prepared_answers or []  # [{"query", "response"}] for possible_questions
+        self.irt = irt  # Calibrated 3PL parameters {"a", "b", "c", "responses"}, if any
+        self.updated_at = updated_at  # Drives the question bank delta sync
+        self.source = source  # Origin of imported questions, e.g. {"name": "inep", "year": 2022, ...}
+        # Rating aggregates kept on the document so low-rated questions are an indexed query
+        if rating_count is None:
+            rating_sum = sum(r.get("rating", 0) for r in self.ratings)
+            rating_count = len(self.ratings)
+        self.rating_sum = rating_sum
+        self.rating_count = rating_count
     
-    def to_dict(self):
-        """Convert question object to dictionary for Firestore"""
-        return {
-            "id": self.id,
-            "text": self.text,
-            "options": self.options,
-            "correct_answer": self.correct_answer,
-            "explanation": self.explanation,
-            "subject": self.subject,
-            "user_id": self.user_id,
-            "topic": self.topic,
-            "difficulty": self.difficulty,
-            "ratings": self.ratings,
-            "possible_questions": self.possible_questions
-        }
+    @property
+    def avg_rating(self):
+        """Average rating, None while unrated"""
+        return self.rating_sum / self.rating_count if self.rating_count else None
     
-    def to_response_dict(self):
-        """Convert question object to API response format"""
-        return {
-            "id": self.id,
-            "text": self.text,
-            "options": self.options,
-            "correctAnswer": self.correct_answer,
-            "explanation": self.explanation,
-            "subject": self.subject,
-            "userId": self.user_id,
-            "topic": self.topic,
-            "difficulty": self.difficulty,
-            "ratings": self.ratings,
-            "possibleQuestions": self.possible_questions
-        }
+    @property
+    def version(self):
+        """What the API response depends on besides the ID, for ETags"""
+        return (self.updated_at, self.rating_sum, self.rating_count)
     
-    @classmethod
-    def from_dict(cls, data):
-        """Create a Question object from Firestore data"""
-        return cls(
-            id=data.get("id"),
-            text=data.get("text"),
-            options=data.get("options", []),
-            correct_answer=data.get("correct_answer"),
-            explanation=data.get("explanation"),
-            subject=data.get("subject"),
-            user_id=data.get("user_id"),
-            topic=data.get("topic"),
-            difficulty=data.get("difficulty"),
-            ratings=data.get("ratings", []),
-            possible_questions=data.get("possible_questions", [])
-        )
+    def _after_decode(self, data):
+        """Derive the rating aggregates of questions saved before they existed"""
+        if self.rating_count is None:
+            self.rating_sum = sum(r.get("rating", 0) for r in self.ratings)
+            self.rating_count = len(self.ratings)
     
     @staticmethod
     def save_batch(questions, user_id):
@@ -79,75 +87,157 @@ class Question:
                 question.user_id = user_id
             elif isinstance(question, dict):
                 question["user_id"] = user_id
-                
+            
             # Convert to Question object if it's a dict
             if isinstance(question, dict):
                 question = Question.from_dict(question)
-                
+            
             # Add to batch
+            question.updated_at = datetime.utcnow()
             doc_ref = db.collection("questions").document(question.id)
             batch.set(doc_ref, question.to_dict())
+            identity_map.store("questions", question.id, question)
         
         # Commit the batch
         batch.commit()
         return questions
-        
+    
     @staticmethod
     def get_by_id(question_id):
-        """Retrieve a question by ID from Firestore"""
-        db = firestore.client()
-        doc_ref = db.collection("questions").document(question_id)
-        doc = doc_ref.get()
+        """Retrieve a question by ID from Firestore (read once per request)"""
+        def load_question():
+            db = firestore.client()
+            doc = db.collection("questions").document(question_id).get()
+            return Question.from_dict(doc.to_dict()) if doc.exists else None
         
-        if not doc.exists:
-            return None
-            
-        return Question.from_dict(doc.to_dict())
+        return identity_map.load("questions", question_id, load_question)
     
     @staticmethod
     def get_by_ids(question_ids):
-        """Retrieve multiple questions by their IDs"""
+        """Retrieve multiple questions by their IDs, in the order given
+        
+        Questions already loaded in the request are reused, the others are
+        read by reference in a single get-all round trip. Missing questions
+        are skipped.
+        """
         if not question_ids:
             return []
-            
-        db = firestore.client()
-        questions = []
         
-        # Firestore has a limit of 10 items in a 'in' query
-        # So we need to batch our requests if we have more than 10 IDs
-        for i in range(0, len(question_ids), 10):
-            batch_ids = question_ids[i:i+10]
-            docs = db.collection("questions").where("id", "in", batch_ids).stream()
-            questions.extend([Question.from_dict(doc.to_dict()) for doc in docs])
+        from app.services.firebase_service import FirebaseService
+        loaded = {}
+        current = identity_map.get_identity_map()
+        if current is not None:
+            for question_id in question_ids:
+                question = current.get("questions", question_id)
+                if question is not None:
+                    loaded[question_id] = question
         
-        return questions
+        missing = [question_id for question_id in question_ids if question_id not in loaded]
+        docs = FirebaseService.get_documents("questions", missing) if missing else {}
+        for question_id in missing:
+            question = Question.from_dict(docs[question_id]) if question_id in docs else None
+            identity_map.store("questions", question_id, question)
+            loaded[question_id] = question or identity_map.MISSING
+        
+        return [loaded[question_id] for question_id in question_ids if loaded[question_id] is not identity_map.MISSING]
+    
+    def find_prepared_answer(self, user_query):
+        """Return the precomputed tutor answer matching the query, if any"""
+        from app.utils.text import normalize_text
+        
+        query = normalize_text(user_query)
+        if not query:
+            return None
+        
+        for prepared in self.prepared_answers:
+            if normalize_text(prepared.get("query")) == query:
+                return prepared.get("response")
+        return None
+    
+    def save_prepared_answers(self, prepared_answers):
+        """Store precomputed tutor answers for the possible questions"""
+        self.prepared_answers = prepared_answers
+        
+        db = firestore.client()
+        self.updated_at = datetime.utcnow()
+        db.collection("questions").document(self.id).update({
+            "prepared_answers": self.prepared_answers,
+            "updated_at": self.updated_at
+        })
+        return self
     
     def add_rating(self, user_id, rating):
-        """Add a rating to the question"""
+        """Add (or replace) the user's rating of the question
+        
+        Each rating is its own question_ratings document ({question}_{user}),
+        and the totals are incremented on one of RATING_SHARDS counter shards
+        picked at random, so concurrent raters never write the same document.
+        The transaction only reads the user's rating, so it only conflicts
+        with the same user rating twice at once. The aggregates on the question
+        document are rolled up from the shards in the background.
+        """
+        from app.config import RATING_SHARDS
+        from app.services.rating_service import rating_rollup
+        
         # Rating should be between 1-5
         if not 1 <= rating <= 5:
             raise ValueError("Rating must be between 1 and 5")
-            
-        # Check if user has already rated this question
-        for i, r in enumerate(self.ratings):
-            if r.get("user_id") == user_id:
-                # Update existing rating
-                self.ratings[i] = {"user_id": user_id, "rating": rating, "timestamp": datetime.utcnow()}
-                break
-        else:
-            # Add new rating
-            from datetime import datetime
-            self.ratings.append({"user_id": user_id, "rating": rating, "timestamp": datetime.utcnow()})
-        
-        # Save to Firestore
+        
         db = firestore.client()
-        db.collection("questions").document(self.id).update({"ratings": self.ratings})
+        question_ref = db.collection("questions").document(self.id)
+        rating_ref = db.collection("question_ratings").document(f"{self.id}_{user_id}")
+        
+        @firestore.transactional
+        def update(transaction):
+            snapshot = rating_ref.get(transaction=transaction)
+            previous = snapshot.get("rating") if snapshot.exists else None
+            transaction.set(rating_ref, {
+                "question_id": self.id,
+                "user_id": user_id,
+                "rating": rating,
+                "timestamp": datetime.utcnow()
+            })
+            shard_ref = question_ref.collection("rating_shards").document(str(random.randrange(RATING_SHARDS)))
+            transaction.set(shard_ref, {
+                "sum": firestore.Increment(rating - (previous or 0)),
+                "count": firestore.Increment(0 if previous else 1)
+            }, merge=True)
+            return previous
+        
+        previous = update(db.transaction())
+        rating_rollup.mark(self.id)
+        
+        # Reflect the rating on this instance without reading the shards back
+        self.rating_sum += rating - (previous or 0)
+        self.rating_count += 0 if previous else 1
         return self
     
+    @staticmethod
+    def get_rating_totals(question_id):
+        """Sum and count of a question's ratings, summed over its counter shards"""
+        db = firestore.client()
+        shards = db.collection("questions").document(question_id).collection("rating_shards").stream()
+        rating_sum = rating_count = 0
+        for shard in shards:
+            data = shard.to_dict()
+            rating_sum += data.get("sum", 0)
+            rating_count += data.get("count", 0)
+        return rating_sum, rating_count
+    
     def get_average_rating(self):
         """Calculate the average rating for this question"""
-        if not self.ratings:
-            return 0
-            
-        total = sum(r.get("rating", 0) for r in self.ratings)
-        return total / len(self.ratings)
+        return self.avg_rating or 0
+    
+    @staticmethod
+    def get_low_rated(user_id, threshold, limit):
+        """The user's questions rated at most threshold, lowest first
+        
+        Reads only the questions returned (index on user_id + avg_rating).
+        """
+        db = firestore.client()
+        query = (db.collection("questions")
+                 .where("user_id", "==", user_id)
+                 .where("avg_rating", "<=", threshold)
+                 .order_by("avg_rating")
+                 .limit(limit))
+        return [Question.from_dict(doc.to_dict()) for doc in query.stream()]
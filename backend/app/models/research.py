@@ -1,10 +1,29 @@
 import uuid
 from datetime import datetime
 from firebase_admin import firestore
+from app.models.fields import Field, mapped, slots, summary_model
+from app.utils import identity_map
+from app.utils.text import html_preview
 
+# Firestore and API mapping of the research fields, compiled by @mapped
+RESEARCH_FIELDS = (
+    Field("id", "id", factory=lambda: f"rs_{uuid.uuid4().hex[:8]}"),
+    Field("user_id", "userId"),
+    Field("topic", "topic"),
+    Field("content", "content", default=""),
+    Field("flashcards", "flashcards", factory=list),
+    Field("created_at", "createdAt", factory=datetime.utcnow, iso=True),
+    # Computed on save so research lists never read the content or flashcards
+    Field("preview", "preview", stored=False),
+    Field("flashcard_count", "flashcardCount", stored=False)
+)
+
+@mapped(RESEARCH_FIELDS)
 class Research:
     """Model class for Research objects"""
     
+    __slots__ = slots(RESEARCH_FIELDS)
+    
     def __init__(self, user_id, topic, content=None, flashcards=None, id=None, created_at=None):
         self.id = id or f"rs_{uuid.uuid4().hex[:8]}"
         self.user_id = user_id
@@ -13,70 +32,67 @@ class Research:
         self.flashcards = flashcards or []
         self.created_at = created_at or datetime.utcnow()
     
-    def to_dict(self):
-        """Convert research object to dictionary for Firestore"""
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "topic": self.topic,
-            "content": self.content,
-            "flashcards": self.flashcards,
-            "created_at": self.created_at
-        }
+    @property
+    def preview(self):
+        return html_preview(self.content)
     
-    def to_response_dict(self):
-        """Convert research object to API response format"""
-        return {
-            "id": self.id,
-            "userId": self.user_id,
-            "topic": self.topic,
-            "content": self.content,
-            "flashcards": self.flashcards,
-            "createdAt": self.created_at.isoformat() if self.created_at else None
-        }
-    
-    @classmethod
-    def from_dict(cls, data):
-        """Create a Research object from Firestore data"""
-        return cls(
-            id=data.get("id"),
-            user_id=data.get("user_id"),
-            topic=data.get("topic"),
-            content=data.get("content", ""),
-            flashcards=data.get("flashcards", []),
-            created_at=data.get("created_at")
-        )
+    @property
+    def flashcard_count(self):
+        return len(self.flashcards)
     
     def save(self):
         """Save research to Firestore"""
         db = firestore.client()
         doc_ref = db.collection("researches").document(self.id)
         doc_ref.set(self.to_dict())
+        identity_map.store("researches", self.id, self)
         return self
     
     @staticmethod
     def get_by_id(research_id):
-        """Retrieve a research by ID from Firestore"""
-        db = firestore.client()
-        doc_ref = db.collection("researches").document(research_id)
-        doc = doc_ref.get()
+        """Retrieve a research by ID from Firestore (read once per request)"""
+        def load_research():
+            db = firestore.client()
+            doc = db.collection("researches").document(research_id).get()
+            return Research.from_dict(doc.to_dict()) if doc.exists else None
         
-        if not doc.exists:
-            return None
-            
-        return Research.from_dict(doc.to_dict())
+        return identity_map.load("researches", research_id, load_research)
     
     @staticmethod
     def get_by_user_id(user_id, limit=50):
-        """Retrieve researches for a specific user"""
+        """Retrieve researches for a specific user, as summaries for list views
+        
+        Only the ResearchSummary fields are selected, never the generated
+        content or flashcards. Researches saved before the preview was stored
+        are read in full once and get it written back.
+        """
         db = firestore.client()
         query = db.collection("researches").where("user_id", "==", user_id)
         
-        # Execute query with limit
-        results = list(query.limit(limit).stream())
+        # Execute query with limit, selecting only the summary fields
+        results = list(query.select(ResearchSummary.PROJECTION).limit(limit).stream())
         
-        # Convert to Research objects
-        researches = [Research.from_dict(doc.to_dict()) for doc in results]
+        # Convert to ResearchSummary objects
+        researches = [ResearchSummary.from_dict(doc.to_dict()) for doc in results]
+        
+        legacy = {research.id: research for research in researches if research.preview is None}
+        if legacy:
+            refs = [db.collection("researches").document(research_id) for research_id in legacy]
+            batch, writes = db.batch(), 0
+            for doc in db.get_all(refs):
+                if not doc.exists:
+                    continue
+                research = Research.from_dict(doc.to_dict())
+                summary = legacy[research.id]
+                summary.preview = research.preview
+                summary.flashcard_count = research.flashcard_count
+                batch.update(doc.reference, {"preview": summary.preview, "flashcard_count": summary.flashcard_count})
+                writes += 1
+                if writes % 500 == 0:
+                    batch.commit()
+                    batch = db.batch()
+            if writes % 500:
+                batch.commit()
         
         return researches
     
@@ -86,4 +102,10 @@ class Research:
         db = firestore.client()
         doc_ref = db.collection("researches").document(research_id)
         doc_ref.delete()
+        identity_map.discard("researches", research_id)
         return True
+
+# Lightweight research model returned by research lists
+ResearchSummary = summary_model(
+    "ResearchSummary", RESEARCH_FIELDS, ("id", "user_id", "topic", "created_at", "preview", "flashcard_count")
+)
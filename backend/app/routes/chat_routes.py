@@ -5,11 +5,18 @@ from datetime import datetime
 from app.middleware.auth import token_required, get_user_id
 from app.models.question import Question
 from app.services.gemini_service import GeminiService
+from app.services.firebase_service import FirebaseService
 from app.utils.response import success_response, error_response
+from app.utils.http_cache import conditional_response, make_etag
 
 # Create blueprint
 chat_bp = Blueprint('chats', __name__)
 
+def _question_snippet(text):
+    """Shorten a question text to the snippet shown in the chat history"""
+    text = text or ""
+    return text[:100] + "..." if len(text) > 100 else text
+
 @chat_bp.route('/questions/<question_id>/chat/start', methods=['POST'])
 @token_required
 def start_question_chat(question_id):
@@ -34,11 +41,15 @@ def start_question_chat(question_id):
             # Save chat to Firestore
             db = firestore.client()
             chat_id = f"chat_{question_id}_{user_id}"
+            question = chat_response["question"]
             
             chat_data = {
                 "id": chat_id,
                 "question_id": question_id,
                 "user_id": user_id,
+                # Denormalised so the history listing needs no question reads
+                "question_snippet": _question_snippet(question.get("text")),
+                "question_subject": question.get("subject"),
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow(),
                 "messages": [
@@ -191,27 +202,41 @@ def get_chat_history():
         query = query.limit(limit)
         
         # Execute query
-        results = query.stream()
-        chats = []
+        results = [doc.to_dict() for doc in query.stream()]
         
-        for doc in results:
-            chat_data = doc.to_dict()
-            
-            # Get question details
+        # Chats created before the snippet was denormalised still need their
+        # question, so fetch all of those in a single batched read
+        missing_ids = [
+            chat_data.get("question_id") for chat_data in results
+            if "question_snippet" not in chat_data
+        ]
+        questions = FirebaseService.get_documents("questions", missing_ids)
+        
+        chats = []
+        for chat_data in results:
             question_id = chat_data.get("question_id")
-            question = Question.get_by_id(question_id)
             
-            if question:
-                # Format chat data for response
-                chat = {
-                    "id": chat_data.get("id"),
-                    "questionId": question_id,
-                    "questionText": question.text[:100] + "..." if len(question.text) > 100 else question.text,
-                    "updatedAt": chat_data.get("updated_at").isoformat() + "Z" if "updated_at" in chat_data else None,
-                    "messageCount": len(chat_data.get("messages", []))
-                }
-                
-                chats.append(chat)
+            if "question_snippet" in chat_data:
+                snippet = chat_data.get("question_snippet")
+                subject = chat_data.get("question_subject")
+            elif question_id in questions:
+                question = questions[question_id]
+                snippet = _question_snippet(question.get("text"))
+                subject = question.get("subject")
+            else:
+                continue
+            
+            # Format chat data for response
+            chat = {
+                "id": chat_data.get("id"),
+                "questionId": question_id,
+                "questionText": snippet,
+                "questionSubject": subject,
+                "updatedAt": chat_data.get("updated_at"),
+                "messageCount": len(chat_data.get("messages", []))
+            }
+            
+            chats.append(chat)
         
         # Return response
         return success_response({
@@ -254,24 +279,28 @@ def get_chat(chat_id):
         if not question:
             return error_response("Questão não encontrada.", "QUESTION_NOT_FOUND", 404)
             
-        # Format messages for response
-        messages = []
-        for msg in chat_data.get("messages", []):
-            messages.append({
-                "content": msg.get("content"),
-                "isUser": msg.get("isUser", False)
-            })
+        def build_response():
+            # Format messages for response
+            messages = []
+            for msg in chat_data.get("messages", []):
+                messages.append({
+                    "content": msg.get("content"),
+                    "isUser": msg.get("isUser", False)
+                })
             
-        # Return response
-        return success_response({
-            "chat": {
-                "id": chat_id,
-                "question": question.to_response_dict(),
-                "messages": messages,
-                "createdAt": chat_data.get("created_at").isoformat() + "Z" if "created_at" in chat_data else None,
-                "updatedAt": chat_data.get("updated_at").isoformat() + "Z" if "updated_at" in chat_data else None
-            }
-        })
+            return success_response({
+                "chat": {
+                    "id": chat_id,
+                    "question": question.to_response_dict(),
+                    "messages": messages,
+                    "createdAt": chat_data.get("created_at"),
+                    "updatedAt": chat_data.get("updated_at")
+                }
+            })
+        
+        # Return response, or 304 when neither the chat nor its question changed
+        etag = make_etag(chat_id, chat_doc.update_time, question.id, question.version)
+        return conditional_response(etag, build_response)
     except Exception as e:
         print(f"Error getting chat: {e}")
         return error_response(
@@ -7,8 +7,14 @@ from app.models.exam import Exam
 from app.models.question import Question
 from app.services.gemini_service import GeminiService
 from app.services.firebase_service import FirebaseService
-from app.utils.response import success_response, error_response
-from app.utils.cache import question_cache
+from app.services.scoring_service import ScoringService
+from app.services.adaptive_service import AdaptiveService
+from app.services.question_bank_service import QuestionBankService
+from app.services.exam_timer_service import exam_timer
+from app.services.autosave_service import AutosaveService, answer_buffer
+from app.utils.response import success_response, error_response, json_fragments
+from app.utils.http_cache import IMMUTABLE, NO_CACHE, conditional_response, make_etag
+from app.config import TUTOR_PRECOMPUTE_BUDGET
 
 # Create blueprint
 exam_bp = Blueprint('exams', __name__)
@@ -16,7 +22,7 @@ exam_bp = Blueprint('exams', __name__)
 @exam_bp.route('/exams/create', methods=['POST'])
 @token_required
 def create_exam():
-    """Create a new exam with questions generated by Gemini"""
+    """Create a new exam from the question bank, generating the rest with Gemini"""
     try:
         # Get request data
         data = request.get_json()
@@ -47,28 +53,42 @@ def create_exam():
             content_selection=data.get('contentSelection')
         )
         
-        # Generate questions synchronously (no background thread)
+        # Adaptive exams pick their questions one at a time from the bank
+        if exam.exam_type == "adaptive":
+            return _create_adaptive_exam(exam, user_id)
+        
+        # Compose the exam synchronously (no background thread)
         try:
-            # Generate questions using Gemini
-            questions = GeminiService.generate_questions_with_cache(
-                content_selection=data.get('contentSelection'),
-                question_count=question_count,
-                user_id=user_id,
-                cache=question_cache
-            )
+            # Sample unseen questions from the bank and generate only the
+            # shortfall with Gemini
+            def generate(count):
+                questions = GeminiService.generate_questions(
+                    content_selection=data.get('contentSelection'),
+                    question_count=count,
+                    user_id=user_id
+                )
+                return Question.save_batch(questions, user_id)
             
-            # Save questions to Firestore as separate documents
-            saved_questions = Question.save_batch(questions, user_id)
+            saved_questions = QuestionBankService.compose_questions(
+                data.get('contentSelection'), question_count, user_id, generate
+            )
             
-            # Update exam with question IDs and status
-            question_ids = [q.id for q in saved_questions]
-            exam.question_ids = question_ids
+            # Update exam with question IDs, answer key and status
+            exam.set_questions(saved_questions)
             exam.status = "ready"
             exam.save()
             
+            # Optionally answer the questions' possible doubts in the background
+            if TUTOR_PRECOMPUTE_BUDGET > 0:
+                threading.Thread(
+                    target=GeminiService.precompute_prepared_answers,
+                    args=(saved_questions, TUTOR_PRECOMPUTE_BUDGET),
+                    daemon=True
+                ).start()
+            
             # Return response with exam details including questions
             return success_response(
-                {"exam": exam.to_response_dict(include_questions=True)},
+                {"exam": exam.to_response_dict(include_questions=True, questions=saved_questions)},
                 "Simulado criado com sucesso.",
                 201
             )
@@ -97,6 +117,36 @@ def create_exam():
             500
         )
 
+def _create_adaptive_exam(exam, user_id):
+    """Create an adaptive exam, generating only the bank's shortfall with Gemini"""
+    def generate(count):
+        questions = GeminiService.generate_questions(exam.content_selection, count, user_id)
+        return Question.save_batch(questions, user_id)
+    
+    try:
+        AdaptiveService.ensure_item_pool(exam, generate)
+        question = AdaptiveService.start(exam)
+        if not question:
+            raise ValueError("No question available for the adaptive exam")
+        
+        exam.status = "ready"
+        exam.save()
+        
+        return success_response(
+            {"exam": exam.to_response_dict(include_questions=True, questions=[question])},
+            "Simulado criado com sucesso.",
+            201
+        )
+    except Exception as e:
+        print(f"Error creating adaptive exam: {e}")
+        exam.status = "error"
+        exam.save()
+        return error_response(
+            "Erro ao gerar questões. Por favor, tente novamente.",
+            "QUESTION_GENERATION_ERROR",
+            500
+        )
+
 @exam_bp.route('/exams/<exam_id>', methods=['GET'])
 @token_required
 def get_exam(exam_id):
@@ -111,8 +161,22 @@ def get_exam(exam_id):
         if not exam:
             return error_response("Simulado não encontrado.", "EXAM_NOT_FOUND", 404)
         
-        # Return exam details
-        return success_response({"exam": exam.to_response_dict()})
+        # The ETag covers the exam document and the versions of its questions
+        questions = Question.get_by_ids(exam.question_ids) if exam.question_ids else []
+        etag = make_etag(exam.id, exam.update_time, *(question.version for question in questions))
+        
+        def build_response():
+            # Questions are shared by many exams: each version is serialised once
+            response = exam.to_response_dict(include_questions=False)
+            if questions:
+                response["questions"] = [
+                    json_fragments.get(("question", question.id, question.version), question.to_response_dict)
+                    for question in questions
+                ]
+            return success_response({"exam": response})
+        
+        # Return exam details, or 304 when the client already has them
+        return conditional_response(etag, build_response, IMMUTABLE if exam.status == "completed" else NO_CACHE)
     except Exception as e:
         print(f"Error getting exam: {e}")
         return error_response(
@@ -172,10 +236,13 @@ def start_exam(exam_id):
         exam.end_time = end_time
         exam.save()
         
+        # Auto-submit the exam if the user never submits it
+        exam_timer.schedule(exam)
+        
         # Return success response
         return success_response({
-            "startTime": start_time.isoformat() + "Z",
-            "endTime": end_time.isoformat() + "Z"
+            "startTime": start_time,
+            "endTime": end_time
         }, "Simulado iniciado com sucesso.")
     except Exception as e:
         print(f"Error starting exam: {e}")
@@ -235,36 +302,22 @@ def submit_exam(exam_id):
         else:
             time_spent = exam.estimated_time  # Fallback if start_time not set
         
-        # Fetch questions from the questions collection
-        from app.models.question import Question
-        questions = Question.get_by_ids(exam.question_ids)
-        
-        # Calculate score
-        total_questions = len(questions)
-        correct_answers = 0
-        
-        # Create a map of question IDs to correct answers
-        question_map = {q.id: q.correct_answer for q in questions}
-        
-        # Check answers
-        for answer in answers:
-            question_id = answer.get('questionId')
-            selected_option = answer.get('selectedOption')
-            
-            if question_id in question_map and question_map[question_id] == selected_option:
-                correct_answers += 1
-        
-        # Calculate score (0-10 scale)
-        score = (correct_answers / total_questions) * 10 if total_questions > 0 else 0
+        # Score from the answer key stored on the exam, no question reads needed
+        result = ScoringService.score_submission(exam.get_answer_key(), answers)
+        score = result["score"]
+        total_questions = result["totalQuestions"]
+        correct_answers = result["correctAnswers"]
         
         # Save result to Firestore
         FirebaseService.save_exam_result(
-            exam_id=exam_id,
-            user_id=user_id,
+            exam=exam,
             answers=answers,
             score=score,
-            time_spent=time_spent
+            time_spent=time_spent,
+            result=result
         )
+        exam_timer.cancel(exam.id)
+        answer_buffer.forget(exam.id)
         
         # Return result
         return success_response({
@@ -273,7 +326,11 @@ def submit_exam(exam_id):
                 "totalQuestions": total_questions,
                 "correctAnswers": correct_answers,
                 "incorrectAnswers": total_questions - correct_answers,
+                "unanswered": result["unanswered"],
                 "timeSpent": time_spent,
+                "breakdown": result["breakdown"],
+                "tri": result.get("tri"),
+                "timing": result.get("timing"),
                 "redirectUrl": f"/exam/result/{exam_id}"
             }
         }, "Simulado avaliado com sucesso.")
@@ -285,6 +342,100 @@ def submit_exam(exam_id):
             500
         )
 
+@exam_bp.route('/exams/<exam_id>/answers', methods=['PATCH'])
+@token_required
+def autosave_answers(exam_id):
+    """Autosave changed answers of an exam in progress"""
+    try:
+        # Get user ID from token
+        user_id = get_user_id()
+        
+        # Get request data
+        data = request.get_json() or {}
+        
+        try:
+            saved = AutosaveService.save_answers(exam_id, user_id, data.get('answers'))
+        except LookupError:
+            return error_response(
+                "Simulado não encontrado ou não está em andamento.",
+                "EXAM_NOT_IN_PROGRESS",
+                404
+            )
+        except TimeoutError:
+            return error_response("O tempo deste simulado acabou.", "EXAM_TIME_OVER", 400)
+        except ValueError:
+            return error_response("Formato de respostas inválido.", "INVALID_ANSWERS_FORMAT", 400)
+        
+        return success_response({"saved": saved})
+    except Exception as e:
+        print(f"Error autosaving answers: {e}")
+        return error_response(
+            "Erro ao salvar respostas.",
+            "INTERNAL_SERVER_ERROR",
+            500
+        )
+
+@exam_bp.route('/exams/<exam_id>/adaptive/answer', methods=['POST'])
+@token_required
+def answer_adaptive_question(exam_id):
+    """Answer the current question of an adaptive exam and get the next one"""
+    try:
+        # Get user ID from token
+        user_id = get_user_id()
+        
+        # Get request data
+        data = request.get_json()
+        
+        # Validate required fields
+        for field in ['questionId', 'selectedOption']:
+            if field not in data:
+                return error_response(f"Campo obrigatório ausente: {field}", "MISSING_FIELD")
+        
+        # Get exam from Firestore
+        exam = Exam.get_by_id(exam_id, user_id)
+        
+        if not exam:
+            return error_response("Simulado não encontrado.", "EXAM_NOT_FOUND", 404)
+        
+        if exam.exam_type != "adaptive" or not exam.adaptive_state:
+            return error_response("Este simulado não é adaptativo.", "EXAM_NOT_ADAPTIVE", 400)
+        
+        if exam.status != "in-progress":
+            return error_response(
+                "Este simulado não está em andamento.",
+                "EXAM_NOT_STARTED",
+                400
+            )
+        
+        try:
+            question = AdaptiveService.answer(exam, data['questionId'], data['selectedOption'])
+        except ValueError:
+            return error_response(
+                "Esta não é a questão atual do simulado.",
+                "INVALID_ADAPTIVE_QUESTION",
+                400
+            )
+        
+        exam.save()
+        
+        # Return the next question, or the final estimate once finished
+        state = exam.adaptive_state
+        return success_response({
+            "finished": question is None,
+            "question": question.to_response_dict() if question else None,
+            "ability": round(state["ability"], 4),
+            "standardError": round(state["standard_error"], 4),
+            "answered": len(state["answers"]),
+            "answers": state["answers"] if question is None else None
+        })
+    except Exception as e:
+        print(f"Error answering adaptive question: {e}")
+        return error_response(
+            "Erro ao responder questão do simulado adaptativo.",
+            "INTERNAL_SERVER_ERROR",
+            500
+        )
+
 @exam_bp.route('/exams/user/history', methods=['GET'])
 @token_required
 def get_user_exams():
@@ -297,6 +448,7 @@ def get_user_exams():
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 10))
         status = request.args.get('status')
+        cursor = request.args.get('cursor')
         
         # Validate page and limit
         if page < 1:
@@ -305,7 +457,10 @@ def get_user_exams():
             limit = 10
         
         # Get exams from Firestore
-        result = Exam.get_user_exams(user_id, status, page, limit)
+        try:
+            result = Exam.get_user_exams(user_id, status, page, limit, cursor)
+        except ValueError:
+            return error_response("Cursor de paginação inválido.", "INVALID_CURSOR", 400)
         
         # Format response
         exams_data = []
@@ -313,16 +468,14 @@ def get_user_exams():
             exam_data = {
                 "id": exam.id,
                 "title": exam.title,
-                "createdAt": exam.created_at.isoformat() + "Z",
+                "createdAt": exam.created_at,
                 "status": exam.status,
                 "questionCount": exam.question_count
             }
             
             # Add score if exam is completed
             if exam.status == "completed":
-                # This would normally come from the exam_results collection
-                # For simplicity, we're using a placeholder
-                exam_data["score"] = getattr(exam, 'score', None)
+                exam_data["score"] = exam.score
             
             exams_data.append(exam_data)
         
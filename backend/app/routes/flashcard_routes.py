@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime, timezone
 
 from app.middleware.auth import token_required, get_user_id
-from app.models.flashcard import Flashcard
+from app.models.flashcard import Flashcard, FlashcardReviewState
 from app.services.flashcard_service import FlashcardService
 from app.utils.response import success_response, error_response
 
@@ -314,7 +314,8 @@ def get_flashcard_stats():
         # Get user ID from token
         user_id = get_user_id()
         
-        results = Flashcard.get_by_user_id(user_id, None)
+        # Only the review state of every card is read, not whole documents
+        results = Flashcard.get_by_user_id(user_id, None, None, FlashcardReviewState)
         
         # Calculate statistics
         total_flashcards = len(results)
@@ -0,0 +1,14 @@
+from flask import Blueprint
+
+from app.middleware.auth import token_required
+from app.utils.metrics import metrics
+from app.utils.response import success_response
+
+# Create blueprint
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@token_required
+def get_metrics():
+    """Get the in-process cache and precomputation metrics"""
+    return success_response({"metrics": metrics.to_dict()})
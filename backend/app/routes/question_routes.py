@@ -71,27 +71,14 @@ def get_error_questions():
         if limit < 1 or limit > 50:
             limit = 10
         
-        # Get questions from Firestore
-        db = Question.firestore.client()
-        query = db.collection("questions").where("user_id", "==", user_id)
-        
-        # Execute query
-        results = list(query.stream())
-        
-        # Filter questions with ratings below threshold
-        error_questions = []
-        for doc in results:
-            question = Question.from_dict(doc.to_dict())
-            avg_rating = question.get_average_rating()
-            if avg_rating > 0 and avg_rating <= threshold:
-                error_questions.append({
-                    "question": question.to_response_dict(),
-                    "averageRating": avg_rating
-                })
-        
-        # Sort by average rating (lowest first) and limit results
-        error_questions.sort(key=lambda x: x["averageRating"])
-        error_questions = error_questions[:limit]
+        # Indexed query on the rating aggregates, lowest rated first
+        error_questions = [
+            {
+                "question": question.to_response_dict(),
+                "averageRating": question.avg_rating
+            }
+            for question in Question.get_low_rated(user_id, threshold, limit)
+        ]
         
         # Return response
         return success_response({
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from app.services.research_service import ResearchService
 from app.middleware.auth import token_required, get_user_id
+from app.utils.http_cache import IMMUTABLE, conditional_response, make_etag
 
 # Create blueprint for research routes
 research_bp = Blueprint('research', __name__)
@@ -132,7 +133,11 @@ def get_research(research_id):
         if research.user_id != user_id:
             return jsonify({'error': 'Unauthorized access to this research'}), 403
         
-        # Return the research
-        return jsonify(research.to_response_dict()), 200
+        # Return the research; researches never change once created
+        return conditional_response(
+            make_etag(research.id, research.created_at),
+            lambda: (jsonify(research.to_response_dict()), 200),
+            IMMUTABLE
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,6 +1,10 @@
-from flask import Blueprint, send_from_directory, render_template_string
+from flask import Blueprint, Response, render_template_string
+import hashlib
 import os
 
+from app.utils.compression import compressor
+from app.utils.http_cache import conditional_response
+
 # Create blueprint
 swagger_bp = Blueprint('swagger', __name__)
 
@@ -65,8 +69,30 @@ def swagger_ui():
     '''
     return render_template_string(html_content)
 
+SWAGGER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'swagger.yaml'
+)
+
+# Contents, ETag and modification time of the swagger.yaml file last read
+_swagger = {"data": None, "etag": None, "mtime": None}
+
+def _load_swagger():
+    """Read swagger.yaml when it changed, precompressing it for every encoding"""
+    mtime = os.path.getmtime(SWAGGER_PATH)
+    if _swagger["mtime"] != mtime:
+        with open(SWAGGER_PATH, 'rb') as f:
+            data = f.read()
+        etag = hashlib.sha1(data).hexdigest()
+        compressor.precompress(etag, data)
+        _swagger.update(data=data, etag=etag, mtime=mtime)
+    return _swagger
+
 @swagger_bp.route('/swagger.yaml', methods=['GET'])
 def serve_swagger_file():
-    """Serve the swagger.yaml file"""
-    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    return send_from_directory(root_dir, 'swagger.yaml')
+    """Serve the swagger.yaml file, precompressed"""
+    swagger = _load_swagger()
+    return conditional_response(
+        swagger["etag"],
+        lambda: Response(swagger["data"], mimetype='application/yaml'),
+        "public, max-age=3600"
+    )
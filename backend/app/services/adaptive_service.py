@@ -0,0 +1,189 @@
+import threading
+import time
+
+import numpy as np
+from app.config import CACHE_TIMEOUT, ADAPTIVE_TARGET_STANDARD_ERROR, ADAPTIVE_MIN_QUESTIONS
+from app.services.firebase_service import FirebaseService
+from app.services.irt_service import IRTService, THETA_GRID
+
+class ItemIndex:
+    """In-memory index of the question bank for adaptive item selection
+    
+    Items are bucketed by subject and difficulty, and the Fisher information
+    of every item at every point of the ability grid is precomputed, so
+    choosing the next item is one argmax over a table column.
+    """
+    
+    def __init__(self, refresh_interval=CACHE_TIMEOUT):
+        self.refresh_interval = refresh_interval
+        self.loaded_at = None
+        self.item_ids = []
+        self.positions = {}  # question_id -> row in the tables
+        self.buckets = {}  # (subject, difficulty) -> list of rows
+        self.information = np.zeros((0, len(THETA_GRID)))
+        self._candidates = {}  # subject -> cached array of rows
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _information_table(answer_key):
+        """Fisher information of each item at each grid point (items x grid)"""
+        a, b, c = IRTService.item_parameters(answer_key)
+        p = np.clip(IRTService.probabilities(a, b, c), 1e-9, 1 - 1e-9).T
+        return a[:, None] ** 2 * ((p - c[:, None]) / (1 - c[:, None])) ** 2 * (1 - p) / p
+    
+    def add(self, items):
+        """Add items (answer key style dicts with id, subject, difficulty, irt)"""
+        items = [item for item in items if item.get("id") and item["id"] not in self.positions]
+        if not items:
+            return
+        
+        information = self._information_table(items)
+        with self._lock:
+            for item in items:
+                row = len(self.item_ids)
+                self.item_ids.append(item["id"])
+                self.positions[item["id"]] = row
+                self.buckets.setdefault((item.get("subject"), item.get("difficulty")), []).append(row)
+            self.information = np.vstack([self.information, information])
+            self._candidates = {}
+    
+    def load(self):
+        """(Re)build the index from the questions collection"""
+        db = FirebaseService.get_db()
+        docs = db.collection("questions").select(["id", "subject", "difficulty", "irt"]).stream()
+        
+        fresh = ItemIndex(self.refresh_interval)
+        fresh.add([doc.to_dict() for doc in docs])
+        
+        with self._lock:
+            self.item_ids, self.positions = fresh.item_ids, fresh.positions
+            self.buckets, self.information = fresh.buckets, fresh.information
+            self._candidates = {}
+            self.loaded_at = time.time()
+    
+    def ensure_loaded(self):
+        """Load the index on first use and refresh it when stale"""
+        if self.loaded_at is None or time.time() - self.loaded_at > self.refresh_interval:
+            self.load()
+    
+    def candidates(self, subject=None):
+        """Rows of the items of a subject (all subjects when None)"""
+        with self._lock:
+            if subject not in self._candidates:
+                rows = [row for (bucket_subject, _), bucket in self.buckets.items()
+                        if subject is None or bucket_subject == subject for row in bucket]
+                self._candidates[subject] = np.array(rows, dtype=np.int64)
+            return self._candidates[subject]
+    
+    def select(self, theta, subject=None, exclude=()):
+        """ID of the most informative item at ability theta, or None"""
+        rows = self.candidates(subject)
+        excluded = [self.positions[item_id] for item_id in exclude if item_id in self.positions]
+        if excluded:
+            rows = rows[~np.isin(rows, excluded)]
+        if not len(rows):
+            return None
+        
+        column = int(np.abs(THETA_GRID - theta).argmin())
+        return self.item_ids[rows[self.information[rows, column].argmax()]]
+
+# Create a global item index instance
+item_index = ItemIndex()
+
+class AdaptiveService:
+    """Service for computerised adaptive exams (CAT)
+    
+    Each step re-estimates the student's ability from the responses so far
+    and administers the unanswered item with maximum Fisher information at
+    that ability, until the standard error target or the question limit is
+    reached.
+    """
+    
+    @staticmethod
+    def _subject(exam):
+        """Subject the exam draws items from, None for all subjects"""
+        if exam.content_selection.get("method") == "subject":
+            subject = exam.content_selection.get("subject")
+            if subject and subject != "all":
+                return subject
+        return None
+    
+    @classmethod
+    def ensure_item_pool(cls, exam, generate):
+        """Make sure the bank has enough items for the exam
+        
+        `generate(count)` is called with the shortfall and must return saved
+        Question objects, which are added to the index.
+        """
+        item_index.ensure_loaded()
+        shortfall = exam.question_count - len(item_index.candidates(cls._subject(exam)))
+        if shortfall > 0:
+            questions = generate(shortfall)
+            item_index.add(exam.build_answer_key(questions))
+    
+    @classmethod
+    def next_question(cls, exam):
+        """Administer the next item of the exam, or None when it is finished"""
+        from app.models.question import Question
+        
+        state = exam.adaptive_state
+        if state.get("finished"):
+            return None
+        
+        item_index.ensure_loaded()
+        question_id = item_index.select(state["ability"], cls._subject(exam), exclude=exam.question_ids)
+        question = Question.get_by_id(question_id) if question_id else None
+        if not question:
+            state["finished"] = True
+            return None
+        
+        exam.add_question(question)
+        return question
+    
+    @classmethod
+    def start(cls, exam):
+        """Initialise the adaptive state and administer the first item"""
+        exam.question_ids = []
+        exam.answer_key = []
+        exam.adaptive_state = {
+            "ability": 0.0,
+            "standard_error": 1.0,
+            "answers": [],
+            "finished": False
+        }
+        return cls.next_question(exam)
+    
+    @classmethod
+    def answer(cls, exam, question_id, selected_option):
+        """Record the answer to the current item and administer the next one
+        
+        Returns the next Question, or None when the exam is finished.
+        """
+        state = exam.adaptive_state
+        if state.get("finished"):
+            raise ValueError("Adaptive exam already finished")
+        
+        answered = len(state["answers"])
+        if answered >= len(exam.question_ids) or exam.question_ids[answered] != question_id:
+            raise ValueError("Question is not the current adaptive question")
+        
+        state["answers"].append({"questionId": question_id, "selectedOption": selected_option})
+        
+        # Re-estimate the ability from every response so far
+        answer_key = exam.answer_key[:len(state["answers"])]
+        responses = np.array([[
+            1 if answer["selectedOption"] == key["answer"] else 0
+            for answer, key in zip(state["answers"], answer_key)
+        ]])
+        a, b, c = IRTService.item_parameters(answer_key)
+        theta, standard_error = IRTService.estimate_abilities(responses, a, b, c)
+        state["ability"] = float(theta[0])
+        state["standard_error"] = float(standard_error[0])
+        
+        count = len(state["answers"])
+        if count >= exam.question_count or (
+                count >= ADAPTIVE_MIN_QUESTIONS and state["standard_error"] <= ADAPTIVE_TARGET_STANDARD_ERROR):
+            state["finished"] = True
+            return None
+        
+        return cls.next_question(exam)
@@ -0,0 +1,132 @@
+import atexit
+import threading
+import time
+from datetime import datetime
+
+from firebase_admin import firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+from app.config import AUTOSAVE_FLUSH_INTERVAL, EXAM_AUTO_SUBMIT_GRACE
+from app.services.firebase_service import FirebaseService
+
+# Valid answer options, None clears an answer
+ANSWER_OPTIONS = {"a", "b", "c", "d", "e", None}
+
+class AnswerBuffer:
+    """Write-behind buffer for the answers of exams in progress
+    
+    Autosave patches (question_id -> selected option) are merged per exam in
+    memory, so a student changing an answer several times costs one write. A
+    background thread flushes each exam's pending answers at most every
+    flush_interval seconds, as a single field-level update of its
+    saved_answers map. The exams being autosaved are cached after the first
+    read, so patches normally cost no Firestore access at all.
+    """
+    
+    def __init__(self, flush_interval=AUTOSAVE_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self.pending = {}  # exam_id -> {question_id: option}
+        self.sessions = {}  # exam_id -> user_id, question IDs and deadline of the exam
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def session(self, exam_id, user_id):
+        """Owner, question IDs and deadline of an exam in progress, None otherwise"""
+        session = self.sessions.get(exam_id)
+        if session is None:
+            from app.models.exam import Exam
+            
+            exam = Exam.get_by_id(exam_id)
+            if not exam or exam.status != "in-progress":
+                return None
+            session = {
+                "user_id": exam.user_id,
+                "question_ids": set(exam.question_ids),
+                "end_time": exam.end_time
+            }
+            self.sessions[exam_id] = session
+        return session if session["user_id"] == user_id else None
+    
+    def add(self, exam_id, answers):
+        """Buffer an autosave patch"""
+        with self._lock:
+            self.pending.setdefault(exam_id, {}).update(answers)
+    
+    def discard(self, exam_id):
+        """Drop the pending answers of an exam (e.g. once it is submitted)"""
+        with self._lock:
+            self.pending.pop(exam_id, None)
+    
+    def forget(self, exam_id):
+        """Drop an exam that is no longer in progress"""
+        self.discard(exam_id)
+        self.sessions.pop(exam_id, None)
+    
+    def flush(self, exam_id=None):
+        """Write the pending answers of one exam (or all exams) to Firestore"""
+        with self._lock:
+            if exam_id is None:
+                pending, self.pending = self.pending, {}
+            else:
+                pending = {exam_id: self.pending.pop(exam_id)} if exam_id in self.pending else {}
+        if not pending:
+            return 0
+        
+        db = FirebaseService.get_db()
+        for pending_exam_id, answers in pending.items():
+            update = {
+                FieldPath("saved_answers", question_id).to_api_repr():
+                    firestore.DELETE_FIELD if option is None else option
+                for question_id, option in answers.items()
+            }
+            update["autosaved_at"] = datetime.utcnow()
+            try:
+                db.collection("exams").document(pending_exam_id).update(update)
+            except Exception as e:
+                print(f"Error autosaving exam {pending_exam_id}: {str(e)}")
+        return len(pending)
+    
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+    
+    def start(self):
+        """Start the flush thread once, and flush what is left at exit"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+# Create a global answer buffer instance
+answer_buffer = AnswerBuffer()
+
+class AutosaveService:
+    """Service for autosaving the answers of exams in progress"""
+    
+    @staticmethod
+    def save_answers(exam_id, user_id, answers):
+        """Validate and buffer an autosave patch
+        
+        Returns the number of answers buffered. Raises LookupError when the
+        exam is not an in-progress exam of the user, TimeoutError when its
+        time is over and ValueError for an invalid patch.
+        """
+        session = answer_buffer.session(exam_id, user_id)
+        if session is None:
+            raise LookupError("Exam not found or not in progress")
+        
+        end_time = session["end_time"]
+        if end_time and (datetime.utcnow() - end_time).total_seconds() > EXAM_AUTO_SUBMIT_GRACE:
+            raise TimeoutError("Exam time is over")
+        
+        if not isinstance(answers, dict) or not answers:
+            raise ValueError("Answers must be a non-empty object")
+        for question_id, option in answers.items():
+            if question_id not in session["question_ids"] or not isinstance(option, (str, type(None))) \
+                    or option not in ANSWER_OPTIONS:
+                raise ValueError(f"Invalid answer for question {question_id}")
+        
+        answer_buffer.add(exam_id, answers)
+        answer_buffer.start()
+        return len(answers)
@@ -0,0 +1,255 @@
+from array import array
+from datetime import datetime
+
+import numpy as np
+from app.services.firebase_service import FirebaseService
+from app.services.irt_service import THETA_GRID, PRIOR
+
+# Bounds keeping the item parameters in a sensible range during estimation
+A_BOUNDS = (0.2, 4.0)
+B_BOUNDS = (-4.0, 4.0)
+C_BOUNDS = (0.0, 0.4)
+
+# Beta(5, 17) prior on the guessing parameter (mode 0.2, five options)
+C_PRIOR_ALPHA = 5.0
+C_PRIOR_BETA = 17.0
+
+class ResponseMatrix:
+    """Compact sparse user x item matrix of correct (1) / incorrect (0) responses
+    
+    Stored as coordinate arrays sorted by user, so each user's responses are
+    contiguous: int32 indices and int8 values, 9 bytes per response.
+    """
+    
+    def __init__(self, rows, cols, values, user_ids, item_ids):
+        order = np.argsort(rows, kind="stable")
+        self.rows = np.asarray(rows, dtype=np.int32)[order]
+        self.cols = np.asarray(cols, dtype=np.int32)[order]
+        self.values = np.asarray(values, dtype=np.int8)[order]
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+    
+    @property
+    def shape(self):
+        return len(self.user_ids), len(self.item_ids)
+    
+    def __len__(self):
+        return len(self.values)
+    
+    def chunks(self, chunk_size):
+        """Split the responses into slices of whole users of about chunk_size"""
+        starts = np.flatnonzero(np.r_[True, self.rows[1:] != self.rows[:-1]]) if len(self) else []
+        bounds = [0]
+        for start in starts[1:]:
+            if start - bounds[-1] >= chunk_size:
+                bounds.append(int(start))
+        bounds.append(len(self))
+        return [slice(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+class CalibrationService:
+    """Offline calibration of 2PL/3PL item parameters from exam results
+    
+    Uses marginal maximum likelihood with the EM algorithm (Bock-Aitkin) over
+    the same quadrature grid as IRTService. Users are processed in chunks, so
+    memory stays bounded by chunk_size x grid points whatever the data size.
+    """
+    
+    @staticmethod
+    def load_responses(page_size=1000):
+        """Stream exam_results into a ResponseMatrix
+        
+        Each page of results loads its exams with one batched read to mark
+        answers correct or incorrect from the exams' answer keys. Blank answers
+        count as incorrect, like in the ENEM.
+        """
+        from app.models.exam import Exam
+        
+        db = FirebaseService.get_db()
+        user_index, item_index, answer_keys = {}, {}, {}
+        # Typed arrays keep the coordinates compact while streaming
+        rows, cols, values = array("i"), array("i"), array("b")
+        
+        query = db.collection("exam_results").order_by("exam_id").limit(page_size)
+        last = None
+        while True:
+            page = list((query.start_after(last) if last else query).stream())
+            if not page:
+                break
+            last = page[-1]
+            
+            missing = [doc.get("exam_id") for doc in page if doc.get("exam_id") not in answer_keys]
+            for exam_id, data in FirebaseService.get_documents("exams", missing).items():
+                answer_keys[exam_id] = [(key["id"], key["answer"]) for key in Exam.from_dict(data).get_answer_key()]
+            
+            for doc in page:
+                result = doc.to_dict()
+                answer_key = answer_keys.get(result.get("exam_id"))
+                if not answer_key:
+                    continue
+                selected = {a.get("questionId"): a.get("selectedOption") for a in result.get("answers", [])}
+                row = user_index.setdefault(result.get("user_id"), len(user_index))
+                for question_id, correct_answer in answer_key:
+                    rows.append(row)
+                    cols.append(item_index.setdefault(question_id, len(item_index)))
+                    values.append(1 if selected.get(question_id) == correct_answer else 0)
+        
+        return ResponseMatrix(
+            np.frombuffer(rows, dtype=np.int32) if rows else np.zeros(0, dtype=np.int32),
+            np.frombuffer(cols, dtype=np.int32) if cols else np.zeros(0, dtype=np.int32),
+            np.frombuffer(values, dtype=np.int8) if values else np.zeros(0, dtype=np.int8),
+            list(user_index),
+            list(item_index)
+        )
+    
+    @staticmethod
+    def _expected_counts(matrix, a, b, c, chunk_size):
+        """E-step: expected (items x grid) response and correct counts
+        
+        Returns (n, r, log_likelihood) where n[i, q] is the expected number of
+        users at grid point q who answered item i and r[i, q] how many of them
+        answered it correctly.
+        """
+        p = np.clip(c + (1.0 - c) / (1.0 + np.exp(-a * (THETA_GRID[:, None] - b))), 1e-9, 1 - 1e-9)
+        log_p, log_q = np.log(p).T, np.log(1.0 - p).T  # items x grid
+        log_prior = np.log(PRIOR)
+        
+        n_items = len(a)
+        n = np.zeros((n_items, len(THETA_GRID)))
+        r = np.zeros_like(n)
+        log_likelihood = 0.0
+        
+        for part in matrix.chunks(chunk_size):
+            rows, cols = matrix.rows[part], matrix.cols[part]
+            values = matrix.values[part].astype(bool)
+            
+            # Log-likelihood of each user at each grid point, summing their responses
+            user_starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            contributions = np.where(values[:, None], log_p[cols], log_q[cols])
+            user_log_likelihood = np.add.reduceat(contributions, user_starts, axis=0) + log_prior
+            
+            # Posterior over the grid for each user
+            peak = user_log_likelihood.max(axis=1, keepdims=True)
+            posterior = np.exp(user_log_likelihood - peak)
+            total = posterior.sum(axis=1, keepdims=True)
+            log_likelihood += float((peak + np.log(total)).sum())
+            posterior /= total
+            
+            # Spread each user's posterior onto the items they answered
+            user_of_response = np.repeat(np.arange(len(user_starts)), np.diff(np.r_[user_starts, len(rows)]))
+            order = np.argsort(cols, kind="stable")
+            sorted_cols = cols[order]
+            item_starts = np.flatnonzero(np.r_[True, sorted_cols[1:] != sorted_cols[:-1]])
+            items = sorted_cols[item_starts]
+            response_posterior = posterior[user_of_response[order]]
+            n[items] += np.add.reduceat(response_posterior, item_starts, axis=0)
+            r[items] += np.add.reduceat(response_posterior * values[order, None], item_starts, axis=0)
+        
+        return n, r, log_likelihood
+    
+    @staticmethod
+    def _maximize(n, r, a, b, c, model, steps=5):
+        """M-step: Fisher scoring of every item's parameters at once"""
+        theta = THETA_GRID[None, :]
+        estimate_c = model == "3pl"
+        k = 3 if estimate_c else 2
+        
+        for _ in range(steps):
+            sigma = 1.0 / (1.0 + np.exp(-a[:, None] * (theta - b[:, None])))
+            p = np.clip(c[:, None] + (1.0 - c[:, None]) * sigma, 1e-9, 1 - 1e-9)
+            
+            # Derivatives of P with respect to a, b and c (items x grid)
+            slope = (1.0 - c[:, None]) * sigma * (1.0 - sigma)
+            derivatives = [slope * (theta - b[:, None]), -slope * a[:, None]]
+            if estimate_c:
+                derivatives.append(1.0 - sigma)
+            derivatives = np.stack(derivatives, axis=1)  # items x k x grid
+            
+            weight = 1.0 / (p * (1.0 - p))
+            gradient = np.einsum("ikq,iq->ik", derivatives, (r - n * p) * weight)
+            information = np.einsum("ikq,ilq,iq->ikl", derivatives, derivatives, n * weight)
+            information += np.eye(k) * 1e-6
+            
+            if estimate_c:
+                gradient[:, 2] += (C_PRIOR_ALPHA - 1) / c - (C_PRIOR_BETA - 1) / (1 - c)
+                information[:, 2, 2] += (C_PRIOR_ALPHA - 1) / c ** 2 + (C_PRIOR_BETA - 1) / (1 - c) ** 2
+            
+            step = np.linalg.solve(information, gradient[..., None])[..., 0]
+            # Damp large steps so a poorly identified item can't diverge
+            step = np.clip(step, -0.5, 0.5)
+            
+            a = np.clip(a + step[:, 0], *A_BOUNDS)
+            b = np.clip(b + step[:, 1], *B_BOUNDS)
+            if estimate_c:
+                c = np.clip(c + step[:, 2], C_BOUNDS[0] + 1e-3, C_BOUNDS[1])
+        
+        return a, b, c
+    
+    @classmethod
+    def fit(cls, matrix, model="3pl", max_iterations=100, tolerance=1e-3, chunk_size=200_000, verbose=False):
+        """Fit item parameters to a ResponseMatrix by MML-EM
+        
+        Returns a dict with the a, b and c arrays (in matrix.item_ids order),
+        the number of responses per item and the number of EM iterations.
+        """
+        if model not in ("2pl", "3pl"):
+            raise ValueError(f"Unknown IRT model: {model}")
+        
+        _, n_items = matrix.shape
+        responses = np.bincount(matrix.cols, minlength=n_items)
+        correct = np.bincount(matrix.cols, weights=matrix.values, minlength=n_items)
+        
+        # Start from the proportion correct of each item
+        guess = 0.2 if model == "3pl" else 0.0
+        proportion = np.clip(correct / np.maximum(responses, 1), 0.05, 0.95)
+        a = np.ones(n_items)
+        b = np.clip(-np.log(proportion / (1 - proportion)), *B_BOUNDS)
+        c = np.full(n_items, guess)
+        
+        iteration = 0
+        for iteration in range(1, max_iterations + 1):
+            n, r, log_likelihood = cls._expected_counts(matrix, a, b, c, chunk_size)
+            new_a, new_b, new_c = cls._maximize(n, r, a, b, c, model)
+            
+            change = max(np.abs(new_a - a).max(), np.abs(new_b - b).max(), np.abs(new_c - c).max())
+            a, b, c = new_a, new_b, new_c
+            if verbose:
+                print(f"EM iteration {iteration}: log-likelihood {log_likelihood:.1f}, max change {change:.5f}")
+            if change < tolerance:
+                break
+        
+        return {"a": a, "b": b, "c": c, "responses": responses, "iterations": iteration}
+    
+    @staticmethod
+    def save_item_parameters(matrix, parameters, min_responses=50):
+        """Write calibrated parameters onto the questions in batches of 500
+        
+        Items with fewer than min_responses responses keep their defaults.
+        Returns the number of questions updated.
+        """
+        db = FirebaseService.get_db()
+        batch = db.batch()
+        pending = updated = 0
+        
+        for i, question_id in enumerate(matrix.item_ids):
+            if parameters["responses"][i] < min_responses:
+                continue
+            batch.update(db.collection("questions").document(question_id), {
+                "irt": {
+                    "a": round(float(parameters["a"][i]), 4),
+                    "b": round(float(parameters["b"][i]), 4),
+                    "c": round(float(parameters["c"][i]), 4),
+                    "responses": int(parameters["responses"][i])
+                },
+                "updated_at": datetime.utcnow()
+            })
+            pending += 1
+            updated += 1
+            # Firestore batches are limited to 500 writes
+            if pending == 500:
+                batch.commit()
+                batch = db.batch()
+                pending = 0
+        
+        if pending:
+            batch.commit()
+        return updated
@@ -0,0 +1,246 @@
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.services.firebase_service import FirebaseService
+
+# INEP area codes to the subjects used by the app
+AREA_SUBJECTS = {
+    "CN": "natural_sciences",
+    "CH": "human_sciences",
+    "LC": "languages",
+    "MT": "mathematics"
+}
+
+# Difficulty buckets from the official IRT difficulty (b) parameter
+DIFFICULTY_THRESHOLDS = ((0.5, "easy"), (1.5, "medium"))
+
+# Firestore batches are limited to 500 writes
+BATCH_SIZE = 500
+
+# INEP publishes its CSV files separated by ";" and encoded in Latin-1
+CSV_OPTIONS = {"delimiter": ";"}
+CSV_ENCODING = "latin-1"
+
+def _read_csv(path):
+    """Stream the rows of an INEP CSV file as dicts"""
+    with open(path, newline="", encoding=CSV_ENCODING) as f:
+        yield from csv.DictReader(f, **CSV_OPTIONS)
+
+def _float(value):
+    """Parse an INEP decimal (may use a comma), None when empty"""
+    try:
+        return float(value.replace(",", "."))
+    except (AttributeError, ValueError):
+        return None
+
+class ImportCheckpoint:
+    """Progress of an import saved to a JSON file so it can be resumed"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.data = {"microdata_rows": 0, "item_counts": {}, "written": 0}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.data.update(json.load(f))
+    
+    def save(self):
+        """Atomically write the checkpoint"""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+class EnemImportService:
+    """Bulk import of official ENEM items (INEP open data) into the question bank
+    
+    The items file (ITENS_PROVA_<year>.csv) gives each item's answer key, area,
+    skill and official 3PL parameters. It has no statements, so they come from
+    a content file with CO_ITEM, TX_ENUNCIADO and TX_ALTERNATIVA_A..E columns;
+    items without content are skipped. The optional microdata file
+    (MICRODADOS_ENEM_<year>.csv, several GB) is streamed row by row to add the
+    empirical proportion of correct answers of each item.
+    """
+    
+    @staticmethod
+    def load_items(items_path):
+        """Read the items file, one entry per CO_ITEM (skipping abandoned items)
+        
+        Returns (items, booklets): items by CO_ITEM, and for every booklet
+        (CO_PROVA) and foreign language the CO_ITEMs in response-string order.
+        """
+        items, positions = {}, {}
+        for row in _read_csv(items_path):
+            if row.get("IN_ITEM_ABAN") == "1":
+                continue
+            item_id = row["CO_ITEM"]
+            items.setdefault(item_id, row)
+            positions.setdefault(row["CO_PROVA"], []).append(
+                (int(row["CO_POSICAO"]), row.get("TP_LINGUA") or "", item_id)
+            )
+        
+        # Language exams only contain the items of the chosen foreign language
+        booklets = {}
+        for booklet, entries in positions.items():
+            entries.sort()
+            for language in ("0", "1"):
+                booklets[(booklet, language)] = [
+                    item_id for _, item_language, item_id in entries if item_language in ("", language)
+                ]
+        return items, booklets
+    
+    @staticmethod
+    def load_content(content_path):
+        """Read statements and options by CO_ITEM"""
+        content = {}
+        for row in _read_csv(content_path):
+            if row.get("TX_ENUNCIADO"):
+                content[row["CO_ITEM"]] = row
+        return content
+    
+    @staticmethod
+    def aggregate_microdata(microdata_path, booklets, checkpoint, report_every=100_000):
+        """Stream the student microdata, counting answers and hits per item
+        
+        Progress is checkpointed every report_every rows, so a restart skips
+        the rows already counted.
+        """
+        counts = checkpoint.data["item_counts"]  # CO_ITEM -> [answered, correct]
+        skip = checkpoint.data["microdata_rows"]
+        start = time.perf_counter()
+        rows = 0
+        
+        for rows, row in enumerate(_read_csv(microdata_path), start=1):
+            if rows <= skip:
+                continue
+            language = row.get("TP_LINGUA") or "0"
+            for area in AREA_SUBJECTS:
+                answers = row.get(f"TX_RESPOSTAS_{area}") or ""
+                key = row.get(f"TX_GABARITO_{area}") or ""
+                booklet = booklets.get((row.get(f"CO_PROVA_{area}"), language if area == "LC" else "0"))
+                if not booklet or not answers:
+                    continue
+                for item_id, answer, correct in zip(booklet, answers, key):
+                    if answer in ".* ":  # Blank or annulled answer
+                        continue
+                    item_counts = counts.setdefault(item_id, [0, 0])
+                    item_counts[0] += 1
+                    item_counts[1] += answer == correct
+            
+            if rows % report_every == 0:
+                checkpoint.data["microdata_rows"] = rows
+                checkpoint.save()
+                elapsed = time.perf_counter() - start
+                print(f"Microdata: {rows:,} rows ({(rows - skip) / elapsed:,.0f} rows/s)")
+        
+        checkpoint.data["microdata_rows"] = max(rows, skip)
+        checkpoint.save()
+        return counts
+    
+    @staticmethod
+    def to_question_dict(item, content, year, counts=None):
+        """Map an INEP item row and its content onto a question document"""
+        a, b, c = (_float(item.get(f"NU_PARAM_{name}")) for name in "ABC")
+        irt = {"a": a, "b": b, "c": c, "responses": 0} if None not in (a, b, c) else None
+        
+        difficulty = "hard"
+        if b is not None:
+            difficulty = next((label for limit, label in DIFFICULTY_THRESHOLDS if b < limit), "hard")
+        
+        source = {"name": "inep", "year": year, "item": item["CO_ITEM"]}
+        if counts and counts[0]:
+            source["responses"] = counts[0]
+            source["p_value"] = round(counts[1] / counts[0], 4)
+        
+        answer = (item.get("TX_GABARITO") or "").strip().lower()
+        return {
+            "id": f"q_enem_{year}_{item['CO_ITEM']}",
+            "text": content["TX_ENUNCIADO"],
+            "options": [
+                {"id": letter, "text": content.get(f"TX_ALTERNATIVA_{letter.upper()}", "")}
+                for letter in "abcde"
+            ],
+            "correct_answer": answer,
+            "explanation": content.get("TX_EXPLICACAO") or f"Gabarito oficial do ENEM {year}: alternativa {answer.upper()}.",
+            "subject": AREA_SUBJECTS.get(item.get("SG_AREA"), item.get("SG_AREA")),
+            "user_id": "inep",
+            "topic": f"Habilidade {item['CO_HABILIDADE']}" if item.get("CO_HABILIDADE") else "",
+            "difficulty": difficulty,
+            "ratings": [],
+            "rating_sum": 0,
+            "rating_count": 0,
+            "avg_rating": None,
+            "possible_questions": [],
+            "prepared_answers": [],
+            "irt": irt,
+            "source": source,
+            "updated_at": datetime.utcnow()
+        }
+    
+    @classmethod
+    def write_questions(cls, question_dicts, checkpoint, workers=4, max_in_flight=8):
+        """Write question documents in 500-write batches with parallel writers
+        
+        Batches are committed concurrently; the checkpoint only advances past a
+        batch once every batch before it has been committed, so a resumed
+        import never skips unwritten questions (rewrites are idempotent).
+        """
+        db = FirebaseService.get_db()
+        skip = checkpoint.data["written"]
+        in_flight = threading.BoundedSemaphore(max_in_flight)
+        lock = threading.Lock()
+        submitted = deque()  # Batch end offsets in submission order
+        committed = set()
+        start = time.perf_counter()
+        
+        def commit(documents, end):
+            try:
+                batch = db.batch()
+                for data in documents:
+                    batch.set(db.collection("questions").document(data["id"]), data)
+                batch.commit()
+                with lock:
+                    committed.add(end)
+                    # Advance the checkpoint over the contiguous committed batches
+                    while submitted and submitted[0] in committed:
+                        committed.remove(submitted[0])
+                        checkpoint.data["written"] = submitted.popleft()
+                    checkpoint.save()
+            finally:
+                in_flight.release()
+        
+        def submit(executor, documents, end):
+            in_flight.acquire()
+            with lock:
+                submitted.append(end)
+            return executor.submit(commit, documents, end)
+        
+        futures = []
+        pending = []
+        offset = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for data in question_dicts:
+                offset += 1
+                if offset <= skip:
+                    continue
+                pending.append(data)
+                if len(pending) == BATCH_SIZE:
+                    futures.append(submit(executor, pending, offset))
+                    pending = []
+            if pending:
+                futures.append(submit(executor, pending, offset))
+        
+        for future in futures:
+            future.result()  # Re-raise the first failed commit
+        
+        written = offset - skip
+        elapsed = time.perf_counter() - start
+        print(f"Questions: {written:,} written in {elapsed:.1f}s ({written / elapsed if elapsed else 0:,.0f} rows/s)")
+        return written
@@ -0,0 +1,141 @@
+import threading
+import time
+from datetime import datetime
+
+from app.config import (EXAM_SWEEP_INTERVAL, EXAM_SWEEP_PAGE_SIZE, EXAM_SWEEP_MAX_PAGES,
+                        EXAM_SWEEP_PAGE_DELAY, EXAM_SWEEP_ORPHAN_QUESTIONS)
+from app.services.firebase_service import FirebaseService
+
+# Statuses of exams that can still expire (completed exams stay in the history)
+EXPIRABLE_STATUSES = ["generating", "ready", "in-progress", "error"]
+
+# Statuses of exams whose questions must be kept
+LIVE_STATUSES = ["generating", "ready", "in-progress", "completed"]
+
+# Firestore batches are limited to 500 writes
+BATCH_SIZE = 500
+
+class ExamExpiryService:
+    """Background sweeper moving exams past their expires_at to "expired"
+    
+    Each run reads the expirable exams with expires_at in the past, one page
+    at a time, and flips their status with batched writes. Expired exams no
+    longer match the query, so an interrupted or repeated run simply picks up
+    what is left. Runs are rate-limited (page size, pages per run and a pause
+    between pages) so the sweeper never competes with user traffic.
+    
+    Questions only used by the expired exams can optionally be archived (moved
+    to archived_questions) or deleted. Rated and imported questions are kept.
+    """
+    
+    _thread = None
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def _commit(db, operations):
+        """Apply (method, ref, data) write operations in batches of 500"""
+        for start in range(0, len(operations), BATCH_SIZE):
+            batch = db.batch()
+            for method, ref, data in operations[start:start + BATCH_SIZE]:
+                if method == "delete":
+                    batch.delete(ref)
+                else:
+                    getattr(batch, method)(ref, data)
+            batch.commit()
+    
+    @staticmethod
+    def _is_orphan(db, question_id, data):
+        """Whether a question can be removed with its expired exams"""
+        if data.get("rating_count") or data.get("ratings") or data.get("source") or (data.get("irt") or {}).get("responses"):
+            return False
+        live = (db.collection("exams")
+                .where("question_ids", "array_contains", question_id)
+                .where("status", "in", LIVE_STATUSES)
+                .limit(1).get())
+        return not live
+    
+    @classmethod
+    def _orphan_operations(cls, db, question_ids, action):
+        """Write operations archiving or deleting the orphaned questions"""
+        operations = []
+        removed = []
+        for question_id, data in FirebaseService.get_documents("questions", list(question_ids)).items():
+            if not cls._is_orphan(db, question_id, data):
+                continue
+            ref = db.collection("questions").document(question_id)
+            if action == "archive":
+                operations.append(("set", db.collection("archived_questions").document(question_id),
+                                   {**data, "archived_at": datetime.utcnow()}))
+            operations.append(("delete", ref, None))
+            removed.append(question_id)
+        return operations, removed
+    
+    @classmethod
+    def sweep(cls, now=None, page_size=EXAM_SWEEP_PAGE_SIZE, max_pages=EXAM_SWEEP_MAX_PAGES,
+              page_delay=EXAM_SWEEP_PAGE_DELAY, orphan_questions=EXAM_SWEEP_ORPHAN_QUESTIONS):
+        """Expire up to max_pages pages of stale exams
+        
+        orphan_questions: "keep", "archive" or "delete"
+        Returns a dict with the number of exams expired and questions removed.
+        """
+        from app.services.question_bank_service import question_bank
+        
+        if orphan_questions not in ("keep", "archive", "delete"):
+            raise ValueError(f"Unknown orphan questions action: {orphan_questions}")
+        
+        db = FirebaseService.get_db()
+        now = now or datetime.utcnow()
+        query = (db.collection("exams")
+                 .where("status", "in", EXPIRABLE_STATUSES)
+                 .where("expires_at", "<=", now)
+                 .order_by("expires_at")
+                 .limit(page_size))
+        
+        expired = removed = 0
+        for _ in range(max_pages):
+            page = query.get()
+            if not page:
+                break
+            
+            operations = []
+            question_ids = set()
+            for doc in page:
+                operations.append(("update", doc.reference, {"status": "expired", "expired_at": now}))
+                question_ids.update(doc.get("question_ids") or [])
+            cls._commit(db, operations)
+            expired += len(page)
+            
+            # Orphans are checked after the status flip so sibling expired exams don't count as live
+            if orphan_questions != "keep" and question_ids:
+                operations, removed_ids = cls._orphan_operations(db, question_ids, orphan_questions)
+                cls._commit(db, operations)
+                question_bank.remove(removed_ids)
+                removed += len(removed_ids)
+            
+            if len(page) < page_size:
+                break
+            time.sleep(page_delay)
+        
+        return {"expired": expired, "questionsRemoved": removed}
+    
+    @classmethod
+    def _run(cls, interval):
+        """Sweep forever, every `interval` seconds"""
+        while True:
+            try:
+                result = cls.sweep()
+                if result["expired"]:
+                    print(f"Exam sweeper: {result['expired']} exams expired, "
+                          f"{result['questionsRemoved']} questions removed")
+            except Exception as e:
+                print(f"Error sweeping expired exams: {str(e)}")
+            time.sleep(interval)
+    
+    @classmethod
+    def start(cls, interval=EXAM_SWEEP_INTERVAL):
+        """Start the background sweeper thread once (interval 0 disables it)"""
+        with cls._lock:
+            if interval <= 0 or cls._thread is not None:
+                return
+            cls._thread = threading.Thread(target=cls._run, args=(interval,), daemon=True)
+            cls._thread.start()
@@ -0,0 +1,116 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+
+from google.api_core.exceptions import FailedPrecondition
+from app.config import EXAM_AUTO_SUBMIT_GRACE
+from app.services.autosave_service import answer_buffer
+from app.services.firebase_service import FirebaseService
+from app.utils.timing_wheel import TimingWheel
+
+class ExamTimer:
+    """Server-side deadlines of the exams in progress
+    
+    Every started exam is scheduled on a timing wheel at its end_time plus a
+    grace period; a background thread advances the wheel once per tick and
+    auto-submits the expired exams from their latest saved answers. The wheel
+    is rebuilt from the in-progress exams in Firestore when the thread starts.
+    """
+    
+    def __init__(self, grace=EXAM_AUTO_SUBMIT_GRACE, tick=1.0, workers=4):
+        self.grace = grace
+        self.tick = tick
+        self.wheel = TimingWheel(tick=tick)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def schedule(self, exam):
+        """Schedule the auto-submission of an exam in progress"""
+        if exam.end_time:
+            deadline = exam.end_time.replace(tzinfo=timezone.utc).timestamp() + self.grace
+            self.wheel.schedule(exam.id, deadline)
+    
+    def cancel(self, exam_id):
+        """Drop the deadline of an exam submitted by the user"""
+        self.wheel.cancel(exam_id)
+    
+    def rebuild(self):
+        """Schedule every in-progress exam stored in Firestore"""
+        from app.models.exam import Exam
+        
+        db = FirebaseService.get_db()
+        docs = db.collection("exams").where("status", "==", "in-progress").select(["id", "end_time"]).stream()
+        count = 0
+        for doc in docs:
+            self.schedule(Exam.from_dict({"id": doc.id, "end_time": doc.to_dict().get("end_time")}))
+            count += 1
+        return count
+    
+    @staticmethod
+    def auto_submit(exam_id):
+        """Submit an exam whose time is over with its latest saved answers
+        
+        Returns True when the exam was submitted. The write is conditioned on
+        the exam being unchanged since it was read, so a user submission (or
+        another server instance) arriving meanwhile wins.
+        """
+        from app.models.exam import Exam
+        from app.services.scoring_service import ScoringService
+        
+        # Write out the answers still buffered before reading them back
+        answer_buffer.flush(exam_id)
+        answer_buffer.forget(exam_id)
+        
+        db = FirebaseService.get_db()
+        snapshot = db.collection("exams").document(exam_id).get()
+        if not snapshot.exists or snapshot.get("status") != "in-progress":
+            return False
+        
+        exam = Exam.from_dict(snapshot.to_dict())
+        if exam.adaptive_state:
+            answers = exam.adaptive_state.get("answers", [])
+        else:
+            answers = exam.get_saved_answers()
+        
+        result = ScoringService.score_submission(exam.get_answer_key(), answers)
+        try:
+            FirebaseService.save_exam_result(
+                exam=exam,
+                answers=answers,
+                score=result["score"],
+                time_spent=exam.estimated_time,
+                result=result,
+                auto_submitted=True,
+                option=db.write_option(last_update_time=snapshot.update_time)
+            )
+        except FailedPrecondition:
+            return False
+        return True
+    
+    def _submit(self, exam_id):
+        try:
+            self.auto_submit(exam_id)
+        except Exception as e:
+            print(f"Error auto-submitting exam {exam_id}: {str(e)}")
+    
+    def _run(self):
+        try:
+            print(f"Exam timer: {self.rebuild()} exams in progress scheduled")
+        except Exception as e:
+            print(f"Error rebuilding exam timers: {str(e)}")
+        while True:
+            for exam_id, _ in self.wheel.advance(time.time()):
+                self.executor.submit(self._submit, exam_id)
+            time.sleep(self.tick)
+    
+    def start(self):
+        """Start the timer thread once"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+# Create a global exam timer instance
+exam_timer = ExamTimer()
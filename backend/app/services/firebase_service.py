@@ -9,6 +9,22 @@ class FirebaseService:
         """Get Firestore database instance"""
         return firestore.client()
     
+    @classmethod
+    def get_documents(cls, collection, doc_ids):
+        """Fetch several documents of a collection in a single round trip
+        
+        Returns a dict of document ID to document data. Missing documents are
+        left out, and duplicate IDs are only fetched once.
+        """
+        doc_ids = list(dict.fromkeys(doc_id for doc_id in doc_ids if doc_id))
+        if not doc_ids:
+            return {}
+        
+        db = cls.get_db()
+        refs = [db.collection(collection).document(doc_id) for doc_id in doc_ids]
+        
+        return {doc.id: doc.to_dict() for doc in db.get_all(refs) if doc.exists}
+    
     @staticmethod
     def verify_token(token):
         """Verify Firebase auth token and return user data"""
@@ -64,43 +80,59 @@ class FirebaseService:
         return user_id
     
     @classmethod
-    def save_exam_result(cls, exam_id, user_id, answers, score, time_spent):
-        """Save exam result to Firestore"""
-        db = cls.get_db()
+    def save_exam_result(cls, exam, answers, score, time_spent, result, auto_submitted=False, option=None):
+        """Save exam result to Firestore in a single atomic batch
         
-        # Get the exam
-        exam_ref = db.collection('exams').document(exam_id)
-        exam_doc = exam_ref.get()
-        
-        if not exam_doc.exists:
-            raise ValueError(f"Exam with ID {exam_id} not found")
-        
-        exam_data = exam_doc.to_dict()
-        
-        # Verify user owns the exam
-        if exam_data.get('user_id') != user_id:
-            raise ValueError("User does not have permission to access this exam")
+        `exam` is the Exam the caller already loaded for the user, so it is
+        not read again here. The exam status, the result document and the
+        user's aggregates are committed together, so a completed exam always
+        has its result. `result` is the ScoringService result of the answers.
+        `option` is an optional write precondition on the exam document, the
+        whole batch fails if the exam changed since it was read.
+        """
+        correct_answers = result["correctAnswers"]
+        db = cls.get_db()
+        batch = db.batch()
+        completed_at = datetime.utcnow()
         
         # Update exam status
-        exam_ref.update({
+        exam_ref = db.collection('exams').document(exam.id)
+        batch.update(exam_ref, {
             'status': 'completed',
-            'completed_at': datetime.utcnow(),
+            'completed_at': completed_at,
             'score': score,
             'time_spent': time_spent,
-            'user_answers': answers
-        })
+            'user_answers': answers,
+            'auto_submitted': auto_submitted
+        }, option=option)
         
         # Save detailed result in a separate collection
-        result_ref = db.collection('exam_results').document(f"{exam_id}_{user_id}")
-        result_ref.set({
-            'exam_id': exam_id,
-            'user_id': user_id,
+        result_ref = db.collection('exam_results').document(f"{exam.id}_{exam.user_id}")
+        batch.set(result_ref, {
+            'exam_id': exam.id,
+            'user_id': exam.user_id,
             'score': score,
-            'total_questions': len(exam_data.get('questions', [])),
-            'correct_answers': int(score * len(exam_data.get('questions', [])) / 10),
+            'total_questions': len(exam.answer_key),
+            'correct_answers': correct_answers,
             'time_spent': time_spent,
-            'completed_at': datetime.utcnow(),
-            'answers': answers
+            'completed_at': completed_at,
+            'answers': answers,
+            'breakdown': result['breakdown'],
+            'tri': result.get('tri'),
+            'timing': result.get('timing'),
+            'auto_submitted': auto_submitted
         })
         
+        # Update the user's aggregates (merge, the user document may not exist yet)
+        user_ref = db.collection('users').document(exam.user_id)
+        batch.set(user_ref, {
+            'exams_completed': firestore.Increment(1),
+            'total_score': firestore.Increment(score),
+            'total_questions_answered': firestore.Increment(len(exam.answer_key)),
+            'total_correct_answers': firestore.Increment(correct_answers),
+            'last_exam_at': completed_at
+        }, merge=True)
+        
+        batch.commit()
+        
         return result_ref.id
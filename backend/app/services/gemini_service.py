@@ -1,11 +1,17 @@
+import asyncio
 import google.generativeai as genai
 import json
-from app.config import GEMINI_API_KEY
+from app.config import GEMINI_API_KEY, GEMINI_QUESTIONS_PER_CALL
 from app.models.question import Question
+from app.utils.metrics import metrics
+from app.utils.semantic_cache import answer_cache
 
 # Configure the Gemini API
 genai.configure(api_key=GEMINI_API_KEY)
 
+# Share of chat starts answered from precomputed possible-question answers
+prepared_answer_metric = metrics.hit_rate("prepared_answers")
+
 class GeminiService:
     """Service for interacting with Google Gemini API to generate questions"""
     
@@ -101,26 +107,50 @@ Responda no seguinte formato JSON:
 ]"""
     
     @classmethod
-    def generate_questions(cls, content_selection, question_count, user_id):
-        """Generate questions using Gemini API based on content selection"""
-        model = cls._get_model()
-        
-        # Create prompt based on content selection method
+    def _create_prompt(cls, content_selection, question_count):
+        """Create the question prompt for a content selection"""
         if content_selection.get("method") == "subject":
             subject = content_selection.get("subject", "all")
-            prompt = cls._create_prompt_by_subject(subject, question_count)
+            return cls._create_prompt_by_subject(subject, question_count)
         elif content_selection.get("method") == "topic":
             topic = content_selection.get("customTopic", "")
-            prompt = cls._create_prompt_by_topic(topic, question_count)
+            return cls._create_prompt_by_topic(topic, question_count)
         else:
             raise ValueError("Invalid content selection method")
+    
+    @classmethod
+    def generate_questions(cls, content_selection, question_count, user_id):
+        """Generate questions using Gemini API based on content selection
+        
+        More than GEMINI_QUESTIONS_PER_CALL questions are requested in chunks
+        sent concurrently through the async client, so generating a full exam
+        takes about as long as generating one chunk.
+        """
+        model = cls._get_model()
+        chunks = [GEMINI_QUESTIONS_PER_CALL] * (question_count // GEMINI_QUESTIONS_PER_CALL)
+        if question_count % GEMINI_QUESTIONS_PER_CALL:
+            chunks.append(question_count % GEMINI_QUESTIONS_PER_CALL)
+        prompts = [cls._create_prompt(content_selection, count) for count in chunks]
         
         # Generate content with Gemini
-        response = model.generate_content(prompt)
+        if len(prompts) == 1:
+            response_texts = [model.generate_content(prompts[0]).text]
+        else:
+            async def generate_all():
+                responses = await asyncio.gather(*(model.generate_content_async(prompt) for prompt in prompts))
+                return [response.text for response in responses]
+            
+            response_texts = asyncio.run(generate_all())
         
-        # Extract and parse JSON from response
+        questions = []
+        for response_text in response_texts:
+            questions.extend(cls._parse_questions(response_text, user_id))
+        return questions
+    
+    @staticmethod
+    def _parse_questions(response_text, user_id):
+        """Parse the JSON array of questions in a Gemini response"""
         try:
-            response_text = response.text
             # Find JSON array in the response
             start_idx = response_text.find('[')
             end_idx = response_text.rfind(']') + 1
@@ -168,7 +198,7 @@ Responda no seguinte formato JSON:
             return questions
         except Exception as e:
             print(f"Error parsing Gemini response: {e}")
-            print(f"Response text: {response.text}")
+            print(f"Response text: {response_text}")
             raise ValueError(f"Failed to parse questions from Gemini response: {e}")
     
     @classmethod
@@ -201,18 +231,10 @@ Responda no seguinte formato JSON:
             return f"topic:{content_selection.get('customTopic')}:count:{question_count}"
         return f"method:{method}:count:{question_count}"
         
-    @classmethod
-    def start_question_chat(cls, question_id, user_query):
-        """Start a chat about a specific question"""
-        from app.models.question import Question
-        
-        # Get the question from Firestore
-        question = Question.get_by_id(question_id)
-        if not question:
-            raise ValueError("Question not found")
-            
-        # Create the initial prompt for the chat
-        prompt = f"""Você é um tutor educacional especializado em ajudar estudantes a compreender questões do ENEM.
+    @staticmethod
+    def _create_chat_prompt(question, user_query):
+        """Create the initial tutor prompt for a doubt about a question"""
+        return f"""Você é um tutor educacional especializado em ajudar estudantes a compreender questões do ENEM.
         
 Detalhes da questão:
 
@@ -239,16 +261,73 @@ Sua resposta deve ser estruturada, começando com uma saudação amigável, segu
                - Use <blockquote> para citações ou destaques importantes
                - Use <code> para trechos de código, se relevante
                - Use <hr> para separar seções principais"""
-        
-        # Generate response with Gemini
+    
+    @classmethod
+    def answer_question_doubt(cls, question, user_query):
+        """Ask Gemini to answer a student's doubt about a question"""
         model = cls._get_model()
-        response = model.generate_content(prompt)
+        response = model.generate_content(cls._create_chat_prompt(question, user_query))
+        return response.text
+    
+    @classmethod
+    def start_question_chat(cls, question_id, user_query):
+        """Start a chat about a specific question"""
+        from app.models.question import Question
+        
+        # Get the question from Firestore
+        question = Question.get_by_id(question_id)
+        if not question:
+            raise ValueError("Question not found")
+        
+        # Serve the doubts prepared at generation time without calling Gemini
+        prepared_answer = question.find_prepared_answer(user_query)
+        if prepared_answer:
+            prepared_answer_metric.hit()
+            return {
+                "question": question.to_response_dict(),
+                "userQuery": user_query,
+                "response": prepared_answer
+            }
+        prepared_answer_metric.miss()
+        
+        # Reuse the answer to a similar doubt another student already asked
+        response = answer_cache.get(question_id, user_query)
+        if response is None:
+            response = cls.answer_question_doubt(question, user_query)
+            answer_cache.set(question_id, user_query, response)
         
         return {
             "question": question.to_response_dict(),
             "userQuery": user_query,
-            "response": response.text
+            "response": response
         }
+    
+    @classmethod
+    def precompute_prepared_answers(cls, questions, budget):
+        """Answer the possible questions of each question ahead of time
+        
+        At most `budget` Gemini calls are made. Questions that already have
+        prepared answers (e.g. reused from the question cache) are skipped.
+        """
+        for question in questions:
+            if budget <= 0:
+                break
+            if question.prepared_answers or not question.possible_questions:
+                continue
+            
+            prepared_answers = []
+            for possible_question in question.possible_questions[:budget]:
+                try:
+                    prepared_answers.append({
+                        "query": possible_question,
+                        "response": cls.answer_question_doubt(question, possible_question)
+                    })
+                except Exception as e:
+                    print(f"Error precomputing answer for question {question.id}: {e}")
+                budget -= 1
+            
+            if prepared_answers:
+                question.save_prepared_answers(prepared_answers)
         
     @classmethod
     def continue_question_chat(cls, question_id, chat_history, user_query):
@@ -0,0 +1,105 @@
+import numpy as np
+
+# Default 3PL item parameters by difficulty, used until items are calibrated.
+# The guessing parameter matches a blind guess among 5 options.
+DEFAULT_ITEM_PARAMETERS = {
+    "easy": {"a": 1.0, "b": -1.0, "c": 0.2},
+    "medium": {"a": 1.0, "b": 0.0, "c": 0.2},
+    "hard": {"a": 1.0, "b": 1.0, "c": 0.2}
+}
+
+# Quadrature grid over the ability scale, with a standard normal prior
+THETA_GRID = np.linspace(-4.0, 4.0, 81)
+PRIOR = np.exp(-0.5 * THETA_GRID ** 2)
+PRIOR /= PRIOR.sum()
+
+# ENEM reports abilities on a scale with mean 500 and standard deviation 100
+ENEM_SCALE_MEAN = 500.0
+ENEM_SCALE_SD = 100.0
+
+class IRTService:
+    """Service for Item Response Theory (TRI) scoring with the 3PL model"""
+    
+    @staticmethod
+    def item_parameters(answer_key):
+        """Get the (a, b, c) parameter arrays of an exam's items
+        
+        Items carrying calibrated parameters in their answer key entry (an
+        "irt" dict with a, b and c) use them, the others fall back to the
+        difficulty-based defaults.
+        """
+        params = np.empty((len(answer_key), 3))
+        for i, key in enumerate(answer_key):
+            item = key.get("irt") or DEFAULT_ITEM_PARAMETERS.get(key.get("difficulty"),
+                                                                 DEFAULT_ITEM_PARAMETERS["medium"])
+            params[i] = (item["a"], item["b"], item["c"])
+        return params[:, 0], params[:, 1], params[:, 2]
+    
+    @staticmethod
+    def probabilities(a, b, c, theta=THETA_GRID):
+        """3PL probability of a correct answer, shape (len(theta), items)"""
+        theta = np.asarray(theta, dtype=float)[:, None]
+        return c + (1.0 - c) / (1.0 + np.exp(-a * (theta - b)))
+    
+    @classmethod
+    def log_likelihood(cls, responses, a, b, c, mask=None):
+        """Log-likelihood of each response pattern at each grid point
+        
+        responses: (students x items) matrix of 1 (correct) and 0 (incorrect)
+        mask: optional matrix of the same shape, 0 for items not administered
+        Returns a (students x grid points) matrix.
+        """
+        responses = np.asarray(responses, dtype=float)
+        mask = np.ones_like(responses) if mask is None else np.asarray(mask, dtype=float)
+        
+        p = np.clip(cls.probabilities(a, b, c), 1e-9, 1 - 1e-9)
+        return (responses * mask) @ np.log(p).T + ((1.0 - responses) * mask) @ np.log(1.0 - p).T
+    
+    @classmethod
+    def estimate_abilities(cls, responses, a, b, c, mask=None, method="eap"):
+        """Estimate abilities of many response patterns at once
+        
+        method: "eap" (posterior mean with a standard normal prior) or "mle"
+            (maximum likelihood over the quadrature grid)
+        Returns (theta, standard_error) arrays.
+        """
+        log_likelihood = cls.log_likelihood(responses, a, b, c, mask)
+        
+        if method == "mle":
+            best = log_likelihood.argmax(axis=1)
+            theta = THETA_GRID[best]
+            # Standard error from the test information at the estimate
+            p = np.clip(cls.probabilities(a, b, c, theta), 1e-9, 1 - 1e-9)
+            information = (a ** 2 * ((p - c) / (1 - c)) ** 2 * (1 - p) / p).sum(axis=1)
+            return theta, 1.0 / np.sqrt(information)
+        if method != "eap":
+            raise ValueError(f"Unknown ability estimation method: {method}")
+        
+        # Subtract the row maximum before exponentiating to avoid underflow
+        posterior = np.exp(log_likelihood - log_likelihood.max(axis=1, keepdims=True)) * PRIOR
+        posterior /= posterior.sum(axis=1, keepdims=True)
+        
+        theta = posterior @ THETA_GRID
+        variance = posterior @ THETA_GRID ** 2 - theta ** 2
+        return theta, np.sqrt(np.maximum(variance, 0.0))
+    
+    @staticmethod
+    def to_enem_scale(theta):
+        """Convert abilities to the ENEM score scale"""
+        return ENEM_SCALE_MEAN + ENEM_SCALE_SD * np.asarray(theta)
+    
+    @classmethod
+    def score_many(cls, answer_key, responses, method="eap"):
+        """Score many (students x items) response patterns of the same exam"""
+        a, b, c = cls.item_parameters(answer_key)
+        theta, standard_error = cls.estimate_abilities(responses, a, b, c, method=method)
+        scores = cls.to_enem_scale(theta)
+        
+        return [
+            {
+                "ability": round(float(theta[i]), 4),
+                "standardError": round(float(standard_error[i]), 4),
+                "score": round(float(scores[i]), 1)
+            }
+            for i in range(len(theta))
+        ]
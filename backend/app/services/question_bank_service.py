@@ -0,0 +1,189 @@
+import heapq
+import random
+import threading
+import time
+
+from firebase_admin import firestore
+from app.config import QUESTION_BANK_SYNC_INTERVAL, QUESTION_BANK_MIN_RATING
+from app.services.firebase_service import FirebaseService
+from app.utils.text import normalize_text
+
+# Fields the bank needs, read with a projection so question texts never load
+BANK_FIELDS = ["id", "subject", "topic", "difficulty", "avg_rating", "updated_at"]
+
+# Sampling weight of questions nobody has rated yet (ratings go from 1 to 5)
+UNRATED_WEIGHT = 3.0
+
+class QuestionBank:
+    """In-memory index of the reusable questions of the questions collection
+    
+    Questions are indexed by subject, topic and difficulty with their average
+    rating. The first use loads the whole collection (projected to the indexed
+    fields), later syncs only read the questions whose updated_at moved past
+    the last one seen.
+    """
+    
+    def __init__(self, sync_interval=QUESTION_BANK_SYNC_INTERVAL, min_rating=QUESTION_BANK_MIN_RATING):
+        self.sync_interval = sync_interval
+        self.min_rating = min_rating
+        self.entries = {}  # question_id -> indexed fields
+        self.by_subject = {}  # subject -> set of question IDs
+        self.by_topic = {}  # normalised topic -> set of question IDs
+        self.by_difficulty = {}  # difficulty -> set of question IDs
+        self.synced_at = None
+        self.watermark = None  # Highest updated_at synced so far
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+    
+    @staticmethod
+    def _entry(data):
+        """Indexed fields of a question document or Question.to_dict()"""
+        return {
+            "subject": data.get("subject"),
+            "topic": normalize_text(data.get("topic")),
+            "difficulty": data.get("difficulty") or "medium",
+            "avg_rating": data.get("avg_rating")
+        }
+    
+    def _unindex(self, question_id):
+        """Remove a question from the indexes"""
+        entry = self.entries.pop(question_id, None)
+        if entry:
+            self.by_subject.get(entry["subject"], set()).discard(question_id)
+            self.by_topic.get(entry["topic"], set()).discard(question_id)
+            self.by_difficulty.get(entry["difficulty"], set()).discard(question_id)
+    
+    def _index(self, question_id, data):
+        """Add or replace a question in the indexes"""
+        self._unindex(question_id)
+        entry = self._entry(data)
+        self.entries[question_id] = entry
+        self.by_subject.setdefault(entry["subject"], set()).add(question_id)
+        self.by_difficulty.setdefault(entry["difficulty"], set()).add(question_id)
+        if entry["topic"]:
+            self.by_topic.setdefault(entry["topic"], set()).add(question_id)
+    
+    def add(self, questions):
+        """Index questions just saved, without waiting for the next sync"""
+        with self._lock:
+            for question in questions:
+                self._index(question.id, question.to_dict())
+    
+    def remove(self, question_ids):
+        """Drop questions that no longer exist"""
+        with self._lock:
+            for question_id in question_ids:
+                self._unindex(question_id)
+    
+    def sync(self, force=False):
+        """Load the bank on first use, then apply the changes since the last sync"""
+        if not force and self.synced_at and time.time() - self.synced_at < self.sync_interval:
+            return
+        # Only one thread syncs, the others keep serving the current index
+        if not self._sync_lock.acquire(blocking=self.synced_at is None):
+            return
+        try:
+            db = FirebaseService.get_db()
+            query = db.collection("questions").select(BANK_FIELDS)
+            if self.watermark is not None:
+                query = query.where("updated_at", ">", self.watermark).order_by("updated_at")
+            
+            docs = query.stream()
+            with self._lock:
+                for doc in docs:
+                    data = doc.to_dict()
+                    self._index(doc.id, data)
+                    updated_at = data.get("updated_at")
+                    if updated_at and (self.watermark is None or updated_at > self.watermark):
+                        self.watermark = updated_at
+                self.synced_at = time.time()
+        finally:
+            self._sync_lock.release()
+    
+    def sample(self, count, subject=None, topic=None, difficulty=None, exclude=()):
+        """Pick up to `count` question IDs, favouring the best rated
+        
+        Questions rated below min_rating and the IDs in `exclude` are skipped.
+        Uses weighted sampling without replacement (Efraimidis-Spirakis).
+        """
+        with self._lock:
+            if topic:
+                candidates = set(self.by_topic.get(normalize_text(topic), ()))
+                if subject:
+                    candidates &= self.by_subject.get(subject, set())
+            elif subject:
+                candidates = set(self.by_subject.get(subject, ()))
+            else:
+                candidates = set(self.entries)
+            if difficulty:
+                candidates &= self.by_difficulty.get(difficulty, set())
+            candidates -= set(exclude)
+            
+            weighted = []
+            for question_id in candidates:
+                rating = self.entries[question_id]["avg_rating"]
+                if rating is not None and rating < self.min_rating:
+                    continue
+                weighted.append((question_id, rating or UNRATED_WEIGHT))
+        
+        chosen = heapq.nlargest(count, weighted, key=lambda item: random.random() ** (1.0 / item[1]))
+        return [question_id for question_id, _ in chosen]
+
+# Create a global question bank instance
+question_bank = QuestionBank()
+
+class QuestionBankService:
+    """Service for composing exams from the question bank"""
+    
+    @staticmethod
+    def get_seen_question_ids(user_id):
+        """IDs of every question already shown to the user"""
+        db = FirebaseService.get_db()
+        doc = db.collection("user_seen_questions").document(user_id).get()
+        return set(doc.to_dict().get("question_ids", [])) if doc.exists else set()
+    
+    @staticmethod
+    def mark_seen(user_id, question_ids):
+        """Record questions as shown to the user"""
+        if not question_ids:
+            return
+        db = FirebaseService.get_db()
+        db.collection("user_seen_questions").document(user_id).set({
+            "question_ids": firestore.ArrayUnion(list(question_ids))
+        }, merge=True)
+    
+    @classmethod
+    def compose_questions(cls, content_selection, question_count, user_id, generate):
+        """Assemble an exam's questions from the bank plus generated ones
+        
+        Bank questions the user has not seen yet are sampled first, and
+        `generate(count)` is only called for the shortfall; it must return the
+        new, saved Question objects.
+        """
+        from app.models.question import Question
+        
+        subject, topic = None, None
+        if content_selection.get("method") == "subject":
+            subject = content_selection.get("subject")
+            if subject == "all":
+                subject = None
+        elif content_selection.get("method") == "topic":
+            topic = content_selection.get("customTopic")
+        
+        question_bank.sync()
+        sampled_ids = question_bank.sample(question_count, subject, topic,
+                                           exclude=cls.get_seen_question_ids(user_id))
+        questions = Question.get_by_ids(sampled_ids)
+        
+        # Questions deleted since the last sync are simply not found
+        found = {question.id for question in questions}
+        question_bank.remove([question_id for question_id in sampled_ids if question_id not in found])
+        
+        shortfall = question_count - len(questions)
+        if shortfall > 0:
+            generated = generate(shortfall)
+            question_bank.add(generated)
+            questions.extend(generated)
+        
+        cls.mark_seen(user_id, [question.id for question in questions])
+        return questions
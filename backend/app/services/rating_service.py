@@ -0,0 +1,61 @@
+import atexit
+import threading
+import time
+from datetime import datetime
+
+from app.config import RATING_ROLLUP_INTERVAL
+from app.services.firebase_service import FirebaseService
+
+class RatingRollup:
+    """Background roll-up of the sharded rating counters onto the questions
+    
+    Rated questions are marked dirty; every interval seconds their shards are
+    summed and rating_sum, rating_count and avg_rating written to the question
+    document, so a popular question gets one write per interval however many
+    ratings it receives, and the low-rating query and question bank stay
+    indexed on the question documents.
+    """
+    
+    def __init__(self, interval=RATING_ROLLUP_INTERVAL):
+        self.interval = interval
+        self.dirty = set()
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def mark(self, question_id):
+        """Schedule the roll-up of a question's rating totals"""
+        with self._lock:
+            self.dirty.add(question_id)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+    
+    def flush(self):
+        """Roll up every dirty question now, returning how many were updated"""
+        from app.models.question import Question
+        
+        with self._lock:
+            dirty, self.dirty = self.dirty, set()
+        
+        db = FirebaseService.get_db()
+        for question_id in dirty:
+            try:
+                rating_sum, rating_count = Question.get_rating_totals(question_id)
+                db.collection("questions").document(question_id).update({
+                    "rating_sum": rating_sum,
+                    "rating_count": rating_count,
+                    "avg_rating": rating_sum / rating_count if rating_count else None,
+                    "updated_at": datetime.utcnow()
+                })
+            except Exception as e:
+                print(f"Error rolling up ratings of question {question_id}: {str(e)}")
+        return len(dirty)
+    
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+# Create a global rating roll-up instance
+rating_rollup = RatingRollup()
@@ -0,0 +1,209 @@
+import numpy as np
+from app.services.firebase_service import FirebaseService
+from app.services.irt_service import IRTService
+
+# Options are encoded as small integers so answers and keys compare as arrays
+OPTION_CODES = {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4}
+UNANSWERED = -1
+
+class ScoringService:
+    """Service for scoring exam submissions with array-backed answer vectors"""
+    
+    BREAKDOWN_FIELDS = ("subject", "topic", "difficulty")
+    
+    @staticmethod
+    def _encode_option(option):
+        """Encode an option letter, unknown or missing options become UNANSWERED"""
+        if not isinstance(option, str):
+            return UNANSWERED
+        return OPTION_CODES.get(option.strip().lower(), UNANSWERED)
+    
+    @classmethod
+    def _key_vector(cls, answer_key):
+        """Vector of the correct option codes, in answer key order"""
+        return np.array([cls._encode_option(key.get("answer")) for key in answer_key], dtype=np.int8)
+    
+    @classmethod
+    def _submission_matrices(cls, answer_key, submissions):
+        """Build the (submissions x questions) selected option and time matrices"""
+        columns = {key["id"]: i for i, key in enumerate(answer_key)}
+        selected = np.full((len(submissions), len(answer_key)), UNANSWERED, dtype=np.int8)
+        times = np.full(selected.shape, np.nan)
+        
+        for row, answers in enumerate(submissions):
+            for answer in answers:
+                column = columns.get(answer.get("questionId"))
+                if column is None:
+                    continue
+                selected[row, column] = cls._encode_option(answer.get("selectedOption"))
+                time_spent = answer.get("timeSpent")
+                if isinstance(time_spent, (int, float)) and time_spent >= 0:
+                    times[row, column] = time_spent
+        
+        return selected, times
+    
+    @staticmethod
+    def _group_matrix(answer_key, field):
+        """One-hot (questions x groups) matrix of a breakdown field, with its labels"""
+        values = [str(key.get(field) or "other") for key in answer_key]
+        labels, inverse = np.unique(values, return_inverse=True)
+        groups = np.zeros((len(values), len(labels)), dtype=np.int32)
+        groups[np.arange(len(values)), inverse] = 1
+        return labels, groups
+    
+    @staticmethod
+    def _timing_stats(times, correct):
+        """Per-submission time statistics, None for rows without any timing"""
+        has_time = ~np.isnan(times)
+        timed = has_time.sum(axis=1)
+        filled = np.where(has_time, times, 0.0)
+        
+        total = filled.sum(axis=1)
+        mean = np.divide(total, timed, out=np.zeros_like(total), where=timed > 0)
+        maximum = np.where(has_time, times, -np.inf).max(axis=1)
+        minimum = np.where(has_time, times, np.inf).min(axis=1)
+        
+        # Average time on correct and incorrect answers
+        timed_correct = (has_time & correct).sum(axis=1)
+        timed_incorrect = (has_time & ~correct).sum(axis=1)
+        total_correct = np.where(correct, filled, 0.0).sum(axis=1)
+        mean_correct = np.divide(total_correct, timed_correct, out=np.zeros_like(total), where=timed_correct > 0)
+        mean_incorrect = np.divide(total - total_correct, timed_incorrect, out=np.zeros_like(total),
+                                   where=timed_incorrect > 0)
+        
+        # nanmedian warns on rows without timing, so only compute it for timed rows
+        median = np.zeros_like(total)
+        if timed.any():
+            median[timed > 0] = np.nanmedian(times[timed > 0], axis=1)
+        
+        return [
+            {
+                "totalSeconds": round(float(total[i]), 1),
+                "averageSeconds": round(float(mean[i]), 1),
+                "medianSeconds": round(float(median[i]), 1),
+                "minSeconds": round(float(minimum[i]), 1),
+                "maxSeconds": round(float(maximum[i]), 1),
+                "averageCorrectSeconds": round(float(mean_correct[i]), 1),
+                "averageIncorrectSeconds": round(float(mean_incorrect[i]), 1),
+                "timedQuestions": int(timed[i])
+            } if timed[i] else None
+            for i in range(len(times))
+        ]
+    
+    @classmethod
+    def score_many(cls, answer_key, submissions):
+        """Score many submissions of the same exam in one vectorised pass
+        
+        answer_key: the exam's answer key (see Exam.build_answer_key)
+        submissions: list of answer lists, each answer a dict with questionId,
+            selectedOption and optionally timeSpent (seconds)
+        """
+        if not submissions:
+            return []
+        
+        key = cls._key_vector(answer_key)
+        selected, times = cls._submission_matrices(answer_key, submissions)
+        
+        correct = (selected == key) & (key != UNANSWERED)
+        answered = selected != UNANSWERED
+        
+        total_questions = len(answer_key)
+        correct_counts = correct.sum(axis=1)
+        answered_counts = answered.sum(axis=1)
+        scores = correct_counts / total_questions * 10 if total_questions else np.zeros(len(submissions))
+        
+        # Per-group totals: (submissions x questions) @ (questions x groups)
+        breakdowns = {}
+        for field in cls.BREAKDOWN_FIELDS:
+            labels, groups = cls._group_matrix(answer_key, field)
+            breakdowns[field] = (labels, groups.sum(axis=0), correct.astype(np.int32) @ groups)
+        
+        timings = cls._timing_stats(times, correct)
+        
+        # TRI scores, blank answers count as incorrect like in the ENEM
+        tri_scores = IRTService.score_many(answer_key, correct) if total_questions else None
+        
+        results = []
+        for i in range(len(submissions)):
+            breakdown = {}
+            for field, (labels, group_totals, group_correct) in breakdowns.items():
+                breakdown[field] = {
+                    str(label): {
+                        "total": int(group_totals[g]),
+                        "correct": int(group_correct[i, g]),
+                        "percentage": round(float(group_correct[i, g]) / int(group_totals[g]) * 100, 1)
+                    }
+                    for g, label in enumerate(labels)
+                }
+            
+            result = {
+                "score": float(scores[i]),
+                "totalQuestions": total_questions,
+                "correctAnswers": int(correct_counts[i]),
+                "incorrectAnswers": total_questions - int(correct_counts[i]),
+                "unanswered": total_questions - int(answered_counts[i]),
+                "breakdown": breakdown
+            }
+            if tri_scores:
+                result["tri"] = tri_scores[i]
+            if timings[i]:
+                result["timing"] = timings[i]
+            results.append(result)
+        
+        return results
+    
+    @classmethod
+    def score_submission(cls, answer_key, answers):
+        """Score a single submission"""
+        return cls.score_many(answer_key, [answers])[0]
+    
+    @classmethod
+    def rescore_exam_results(cls, chunk_size=500):
+        """Re-score every stored exam result with the current scoring engine
+        
+        Results are streamed in chunks; each chunk loads its exams with one
+        batched read, scores each exam's results in bulk and writes them back
+        in one batch, so chunk_size must stay within Firestore's 500 writes
+        per batch. Returns the number of results re-scored.
+        """
+        from app.models.exam import Exam
+        
+        db = FirebaseService.get_db()
+        rescored = 0
+        chunk = []
+        
+        def flush(chunk):
+            exams = FirebaseService.get_documents("exams", [doc.get("exam_id") for doc in chunk])
+            by_exam = {}
+            for doc in chunk:
+                if doc.get("exam_id") in exams:
+                    by_exam.setdefault(doc.get("exam_id"), []).append(doc)
+            
+            batch = db.batch()
+            count = 0
+            for exam_id, docs in by_exam.items():
+                answer_key = Exam.from_dict(exams[exam_id]).get_answer_key()
+                results = cls.score_many(answer_key, [doc.to_dict().get("answers", []) for doc in docs])
+                for doc, result in zip(docs, results):
+                    batch.update(doc.reference, {
+                        "score": result["score"],
+                        "total_questions": result["totalQuestions"],
+                        "correct_answers": result["correctAnswers"],
+                        "breakdown": result["breakdown"],
+                        "tri": result.get("tri")
+                    })
+                    count += 1
+            
+            if count:
+                batch.commit()
+            return count
+        
+        for doc in db.collection("exam_results").stream():
+            chunk.append(doc)
+            if len(chunk) >= chunk_size:
+                rescored += flush(chunk)
+                chunk = []
+        if chunk:
+            rescored += flush(chunk)
+        
+        return rescored
@@ -11,13 +11,14 @@ class SimpleCache:
     
     def get(self, key):
         """Get a value from the cache"""
-        if key in self.cache:
-            entry = self.cache[key]
+        # Single dict operations, safe with concurrent request threads
+        entry = self.cache.get(key)
+        if entry is not None:
             if time.time() - entry['timestamp'] < self.timeout:
                 return entry['value']
             else:
                 # Entry expired
-                del self.cache[key]
+                self.cache.pop(key, None)
         return None
     
     def set(self, key, value):
@@ -29,8 +30,7 @@ class SimpleCache:
     
     def delete(self, key):
         """Delete a value from the cache"""
-        if key in self.cache:
-            del self.cache[key]
+        self.cache.pop(key, None)
     
     def clear(self):
         """Clear the entire cache"""
@@ -0,0 +1,114 @@
+import gzip
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+from app.config import COMPRESSION_MIN_SIZE, COMPRESSION_CACHE_BYTES
+from app.utils.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Content encodings in order of preference
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+COMPRESSIBLE_TYPES = {"application/json", "application/yaml", "application/x-yaml", "text/yaml",
+                      "text/html", "text/plain", "text/css", "application/javascript"}
+
+def compress(data, encoding, cacheable=False):
+    """Compress a body; cacheable bodies are compressed once, at the best ratio"""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if cacheable else 5)
+    return gzip.compress(data, compresslevel=9 if cacheable else 6)
+
+def encoded_etag(etag, encoding):
+    """ETag of the `encoding` representation of a response tagged `etag`"""
+    return f"{etag}-{encoding}"
+
+class ResponseCompressor:
+    """Gzip/Brotli compression of responses, negotiated with Accept-Encoding
+    
+    Bodies under min_size bytes are sent as they are. Responses carrying an
+    ETag and no "no-cache" directive (completed exams, researches, the
+    Swagger file) are compressed once at the highest level and kept in a
+    byte-bounded LRU keyed by ETag and encoding, so repeated loads only copy
+    the precompressed body. Other responses are compressed at a fast level
+    on every request.
+    """
+    
+    def __init__(self, min_size=COMPRESSION_MIN_SIZE, cache_bytes=COMPRESSION_CACHE_BYTES):
+        self.min_size = min_size
+        self.cache_bytes = cache_bytes
+        self.cache = OrderedDict()  # (etag, encoding) -> compressed body
+        self.size = 0
+        self._lock = threading.Lock()
+        self._hits = metrics.hit_rate("precompressed_responses")
+    
+    def init_app(self, app):
+        """Compress the responses of a Flask app"""
+        app.after_request(self.after_request)
+    
+    def get(self, key):
+        with self._lock:
+            body = self.cache.get(key)
+            if body is not None:
+                self.cache.move_to_end(key)
+            return body
+    
+    def put(self, key, body):
+        if len(body) > self.cache_bytes:
+            return
+        with self._lock:
+            if key in self.cache:
+                return
+            self.cache[key] = body
+            self.size += len(body)
+            while self.size > self.cache_bytes:
+                _, evicted = self.cache.popitem(last=False)
+                self.size -= len(evicted)
+    
+    def precompress(self, etag, data):
+        """Compress a payload ahead of its first request"""
+        for encoding in ENCODINGS:
+            if self.get((etag, encoding)) is None:
+                self.put((etag, encoding), compress(data, encoding, cacheable=True))
+    
+    def after_request(self, response):
+        """Compress the response when the client accepts it and it is worth it"""
+        response.vary.add("Accept-Encoding")
+        if (response.status_code != 200 or response.direct_passthrough
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+        
+        encoding = request.accept_encodings.best_match(ENCODINGS)
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        
+        etag, weak = response.get_etag()
+        cacheable = etag is not None and not weak and "no-cache" not in response.headers.get("Cache-Control", "")
+        body = self.get((etag, encoding)) if cacheable else None
+        if body is not None:
+            self._hits.hit()
+        else:
+            if cacheable:
+                self._hits.miss()
+            body = compress(data, encoding, cacheable)
+            if cacheable:
+                self.put((etag, encoding), body)
+        
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        if etag is not None:
+            # Each encoding is a different representation with its own strong ETag
+            response.set_etag(encoded_etag(etag, encoding), weak)
+        return response
+
+# Create a global response compressor instance
+compressor = ResponseCompressor()
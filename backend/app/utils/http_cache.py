@@ -0,0 +1,54 @@
+import hashlib
+
+from flask import make_response, request
+
+from app.config import HTTP_CACHE_IMMUTABLE_MAX_AGE
+from app.utils.compression import ENCODINGS, encoded_etag
+from app.utils.metrics import metrics
+
+# Responses built per user: never stored by shared caches
+NO_CACHE = "private, no-cache"
+IMMUTABLE = f"private, max-age={HTTP_CACHE_IMMUTABLE_MAX_AGE}, immutable"
+
+_not_modified = metrics.hit_rate("conditional_get")
+
+def make_etag(*versions):
+    """Strong ETag over the versions (IDs, update times) a response is built from
+    
+    Returns None when a version is unknown, e.g. a model saved in this
+    request, so the response is sent without an ETag.
+    """
+    if any(version is None for version in versions):
+        return None
+    return hashlib.sha1("\x1f".join(map(str, versions)).encode("utf-8")).hexdigest()
+
+def _matching_etag(etag):
+    """The tag of the client's copy when it is `etag` in any content encoding"""
+    for tag in (etag, *(encoded_etag(etag, encoding) for encoding in ENCODINGS)):
+        if request.if_none_match.contains(tag):
+            return tag
+    return None
+
+def conditional_response(etag, build, cache_control=NO_CACHE):
+    """Answer 304 Not Modified when the client has `etag`, else the response of build()
+    
+    build() (which serialises the payload) only runs when the client's copy
+    is missing or stale.
+    """
+    matched = _matching_etag(etag) if etag is not None else None
+    if matched is not None:
+        _not_modified.hit()
+        response = make_response("", 304)
+        etag = matched
+    else:
+        if etag is not None:
+            _not_modified.miss()
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    
+    if etag is not None:
+        response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    response.vary.add("Authorization")
+    return response
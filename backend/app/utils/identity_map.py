@@ -0,0 +1,57 @@
+from flask import g, has_request_context
+
+# Marks documents known not to exist, so repeated misses are not read again
+MISSING = object()
+
+class IdentityMap:
+    """Models loaded during one request, keyed by (collection, document ID)
+    
+    Repeated loads of the same document within a request return the same
+    object without reading Firestore again, and saves keep it up to date.
+    """
+    
+    def __init__(self):
+        self.entries = {}
+    
+    def get(self, collection, doc_id):
+        """The loaded model, MISSING if known not to exist, None if not loaded"""
+        return self.entries.get((collection, doc_id))
+    
+    def add(self, collection, doc_id, model):
+        self.entries[(collection, doc_id)] = MISSING if model is None else model
+    
+    def discard(self, collection, doc_id):
+        self.entries.pop((collection, doc_id), None)
+
+def get_identity_map():
+    """The identity map of the current request, None outside requests"""
+    if not has_request_context():
+        return None
+    if "identity_map" not in g:
+        g.identity_map = IdentityMap()
+    return g.identity_map
+
+def load(collection, doc_id, loader):
+    """Load a model once per request: loader() runs only on the first call"""
+    identity_map = get_identity_map()
+    if identity_map is None:
+        return loader()
+    
+    model = identity_map.get(collection, doc_id)
+    if model is None:
+        model = loader()
+        identity_map.add(collection, doc_id, model)
+        return model
+    return None if model is MISSING else model
+
+def store(collection, doc_id, model):
+    """Record a model just saved (or loaded) in the current request"""
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        identity_map.add(collection, doc_id, model)
+
+def discard(collection, doc_id):
+    """Forget a model deleted in the current request"""
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        identity_map.discard(collection, doc_id)
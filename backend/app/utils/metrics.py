@@ -0,0 +1,89 @@
+import random
+import threading
+from collections import deque
+
+class HitRateCounter:
+    """Thread-safe hit/miss counter for caches and precomputed answers"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def hit(self):
+        """Record a hit"""
+        with self._lock:
+            self.hits += 1
+    
+    def miss(self):
+        """Record a miss"""
+        with self._lock:
+            self.misses += 1
+    
+    def hit_rate(self):
+        """Fraction of lookups that were hits"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    def to_dict(self):
+        """Convert counter to API response format"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hit_rate(), 4)
+        }
+
+class SampledHitRateCounter(HitRateCounter):
+    """Hit rate counter that keeps a random sample of hits for manual review
+    
+    Used to estimate the false-hit rate of approximate caches: reviewers look
+    at the sampled (query, matched query, score) triples.
+    """
+    
+    def __init__(self, name, sample_rate=0.05, max_samples=100):
+        super().__init__(name)
+        self.sample_rate = sample_rate
+        self.samples = deque(maxlen=max_samples)
+    
+    def sample(self, payload):
+        """Keep the payload of a hit with probability sample_rate"""
+        if random.random() < self.sample_rate:
+            with self._lock:
+                self.samples.append(payload)
+    
+    def to_dict(self):
+        """Convert counter and sampled hits to API response format"""
+        data = super().to_dict()
+        with self._lock:
+            data["samples"] = list(self.samples)
+        return data
+
+class MetricsRegistry:
+    """In-memory registry of the process metrics"""
+    
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+    
+    def register(self, metric):
+        """Register a metric (any object with a name and to_dict)"""
+        with self._lock:
+            return self.metrics.setdefault(metric.name, metric)
+    
+    def hit_rate(self, name):
+        """Get or create a hit rate counter"""
+        return self.register(HitRateCounter(name))
+    
+    def sampled_hit_rate(self, name, sample_rate=0.05):
+        """Get or create a hit rate counter that samples hits"""
+        return self.register(SampledHitRateCounter(name, sample_rate))
+    
+    def to_dict(self):
+        """Snapshot of every registered metric"""
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return {metric.name: metric.to_dict() for metric in metrics}
+
+# Create a global metrics registry
+metrics = MetricsRegistry()
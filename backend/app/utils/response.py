@@ -1,4 +1,125 @@
+import json
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
 from flask import jsonify
+from flask.json.provider import JSONProvider
+
+from app.config import JSON_FRAGMENT_CACHE_SIZE
+
+try:
+    import orjson
+except ImportError:  # stdlib json
+    orjson = None
+
+if orjson:
+    # Naive datetimes are UTC throughout the app and are written with a "Z"
+    _ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Placeholder strings standing for RawJSON values until they are spliced in
+_RAW_TOKEN = f"@raw-{uuid.uuid4().hex}-"
+_RAW_PATTERN = re.compile(rf'"{_RAW_TOKEN}(\d+)"'.encode("ascii"))
+
+class RawJSON:
+    """Already serialised JSON (bytes), written into responses as it is"""
+    
+    __slots__ = ("data",)
+    
+    def __init__(self, data):
+        self.data = data
+
+def _iso(value):
+    """ISO 8601 UTC timestamp with a "Z", as the API has always sent them"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat() + "Z"
+
+def _default(value):
+    """Encode the values JSON has no type for: datetimes, models, numpy scalars"""
+    if isinstance(value, datetime):
+        return _iso(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    to_response_dict = getattr(value, "to_response_dict", None)
+    if to_response_dict is not None:
+        return to_response_dict()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def encode_json(obj):
+    """Serialise obj to JSON bytes, with orjson when it is installed
+    
+    Datetimes are written as ISO 8601 UTC with a "Z", models through their
+    to_response_dict(), and RawJSON values are spliced in unchanged.
+    """
+    fragments = []
+    
+    def default(value):
+        if isinstance(value, RawJSON):
+            fragments.append(value.data)
+            return f"{_RAW_TOKEN}{len(fragments) - 1}"
+        return _default(value)
+    
+    if orjson:
+        data = orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+    else:
+        data = json.dumps(obj, default=default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    if fragments:
+        data = _RAW_PATTERN.sub(lambda match: fragments[int(match.group(1))], data)
+    return data
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider writing responses with encode_json()"""
+    
+    def dumps(self, obj, **kwargs):
+        return encode_json(obj).decode("utf-8")
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if orjson else json.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(encode_json(obj), mimetype="application/json")
+
+class JSONFragmentCache:
+    """LRU cache of serialised response fragments
+    
+    Keyed by what the fragment depends on (e.g. a question's ID and version),
+    so payloads shared by many responses are serialised once.
+    """
+    
+    def __init__(self, max_entries=JSON_FRAGMENT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, build):
+        """RawJSON of the fragment for key, serialising build() on a miss"""
+        with self._lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                return RawJSON(data)
+        
+        data = encode_json(build())
+        with self._lock:
+            self.entries[key] = data
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return RawJSON(data)
+
+# Create a global JSON fragment cache instance
+json_fragments = JSONFragmentCache()
 
 def success_response(data=None, message=None, status_code=200):
     """Create a standardized success response"""
@@ -0,0 +1,112 @@
+import math
+import re
+import threading
+import time
+from collections import Counter
+from app.config import (CACHE_TIMEOUT, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SAMPLE_RATE,
+                        SEMANTIC_CACHE_MAX_ENTRIES)
+from app.utils.metrics import metrics
+from app.utils.text import normalize_text
+
+# Tokens that change the meaning of a doubt even when the rest is identical,
+# e.g. "por que não é a letra b?" vs "por que não é a letra c?". "a" and "e"
+# are also Portuguese words, so they only count after "letra", "alternativa"...
+_KEY_TOKEN = re.compile(r"\b(?:[b-d]|\d+)\b")
+_OPTION_REF = re.compile(r"\b(?:letra|alternativa|opcao|item)\s+([a-e])\b")
+
+def _ngram_vector(text, n=3):
+    """Character n-gram count vector of a normalised text"""
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+def _key_tokens(text):
+    """Option letters and numbers mentioned in a normalised text"""
+    return frozenset(_KEY_TOKEN.findall(text)) | frozenset(_OPTION_REF.findall(text))
+
+def _cosine(a, b, norm_a, norm_b):
+    """Cosine similarity of two sparse count vectors"""
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(count * b.get(gram, 0) for gram, count in a.items())
+    return dot / (norm_a * norm_b) if norm_a and norm_b else 0.0
+
+class SemanticAnswerCache:
+    """Per-question cache of tutor answers matched by query similarity
+    
+    New queries are compared against earlier first-turn queries about the same
+    question using cosine similarity of character trigram vectors, so small
+    rewordings, accents and punctuation still hit. Queries mentioning different
+    option letters or numbers never match each other.
+    """
+    
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+                 timeout=CACHE_TIMEOUT, sample_rate=SEMANTIC_CACHE_SAMPLE_RATE):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.entries = {}  # question_id -> list of cached answers
+        self.metric = metrics.sampled_hit_rate("semantic_answer_cache", sample_rate)
+        self._lock = threading.Lock()
+    
+    def get(self, question_id, query):
+        """Get the cached answer of the most similar earlier query, if any"""
+        text = normalize_text(query)
+        vector = _ngram_vector(text)
+        norm = math.sqrt(sum(count * count for count in vector.values()))
+        key_tokens = _key_tokens(text)
+        now = time.time()
+        
+        best_entry, best_score = None, 0.0
+        with self._lock:
+            entries = [
+                entry for entry in self.entries.get(question_id, [])
+                if now - entry["timestamp"] < self.timeout
+            ]
+            self.entries[question_id] = entries
+        
+        for entry in entries:
+            if entry["key_tokens"] != key_tokens:
+                continue
+            score = _cosine(vector, entry["vector"], norm, entry["norm"])
+            if score > best_score:
+                best_entry, best_score = entry, score
+        
+        if best_entry is None or best_score < self.threshold:
+            self.metric.miss()
+            return None
+        
+        self.metric.hit()
+        self.metric.sample({
+            "questionId": question_id,
+            "query": query,
+            "matchedQuery": best_entry["query"],
+            "score": round(best_score, 4)
+        })
+        return best_entry["response"]
+    
+    def set(self, question_id, query, response):
+        """Cache the answer to a first-turn query about a question"""
+        text = normalize_text(query)
+        vector = _ngram_vector(text)
+        entry = {
+            "query": query,
+            "vector": vector,
+            "norm": math.sqrt(sum(count * count for count in vector.values())),
+            "key_tokens": _key_tokens(text),
+            "response": response,
+            "timestamp": time.time()
+        }
+        
+        with self._lock:
+            entries = self.entries.setdefault(question_id, [])
+            entries.append(entry)
+            # Keep only the most recent answers for each question
+            del entries[:-self.max_entries]
+    
+    def clear(self):
+        """Clear the entire cache"""
+        with self._lock:
+            self.entries = {}
+
+# Create a global answer cache instance
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,21 @@
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text):
+    """Normalise free text for matching: lowercase, no accents, no punctuation"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = _NON_WORD.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+_HTML_TAG = re.compile(r"<[^>]*>")
+
+def html_preview(html, length=150):
+    """Plain-text excerpt of generated HTML, as shown on list cards"""
+    text = _HTML_TAG.sub("", html or "").replace("```html", "", 1)
+    return text[:length] + ("..." if len(text) > length else "")
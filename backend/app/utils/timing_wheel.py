@@ -0,0 +1,87 @@
+import math
+import threading
+import time
+
+class TimingWheel:
+    """Hierarchical timing wheel holding many deadlines cheaply
+    
+    Level 0 has one slot per tick, each higher level one slot per full
+    rotation of the level below. Scheduling and cancelling are O(1); a timer
+    far in the future sits in a coarse slot and cascades down to finer levels
+    as its deadline approaches, so each tick only touches the timers due.
+    With 1 second ticks and 64 slots, 4 levels cover about 194 days.
+    """
+    
+    def __init__(self, tick=1.0, slots=64, levels=4, start=None):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.current = int((time.time() if start is None else start) // tick)  # Last tick processed
+        self.wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.timers = {}  # key -> (level, slot)
+        self.overdue = {}  # key -> payload of timers scheduled in the past
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self.timers) + len(self.overdue)
+    
+    def __contains__(self, key):
+        return key in self.timers or key in self.overdue
+    
+    def _place(self, key, due, payload):
+        """Put a timer in the finest level whose span covers its deadline"""
+        delta = due - self.current
+        if delta <= 0:
+            self.overdue[key] = payload
+            return
+        level = 0
+        while level < self.levels - 1 and delta >= self.slots ** (level + 1):
+            level += 1
+        slot = (due // self.slots ** level) % self.slots
+        self.wheels[level][slot][key] = (due, payload)
+        self.timers[key] = (level, slot)
+    
+    def _remove(self, key):
+        location = self.timers.pop(key, None)
+        if location:
+            level, slot = location
+            self.wheels[level][slot].pop(key, None)
+        self.overdue.pop(key, None)
+    
+    def schedule(self, key, deadline, payload=None):
+        """Schedule (or reschedule) key to expire at `deadline` (seconds)"""
+        with self._lock:
+            self._remove(key)
+            self._place(key, math.ceil(deadline / self.tick), payload)
+    
+    def cancel(self, key):
+        """Cancel the timer of key, if any"""
+        with self._lock:
+            self._remove(key)
+    
+    def advance(self, now):
+        """Process every tick up to `now`, returning the expired (key, payload) pairs"""
+        target = int(now // self.tick)
+        with self._lock:
+            expired = list(self.overdue.items())
+            self.overdue = {}
+            while self.current < target:
+                self.current += 1
+                # Cascade the coarser levels whose slot starts at this tick
+                for level in range(self.levels - 1, 0, -1):
+                    span = self.slots ** level
+                    if self.current % span == 0:
+                        slot = (self.current // span) % self.slots
+                        timers, self.wheels[level][slot] = self.wheels[level][slot], {}
+                        for key, (due, payload) in timers.items():
+                            del self.timers[key]
+                            self._place(key, due, payload)
+                # Fire level 0, plus anything the cascade found already due
+                slot = self.current % self.slots
+                timers, self.wheels[0][slot] = self.wheels[0][slot], {}
+                for key, (_, payload) in timers.items():
+                    del self.timers[key]
+                    expired.append((key, payload))
+                expired.extend(self.overdue.items())
+                self.overdue = {}
+        return expired
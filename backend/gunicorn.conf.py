@@ -0,0 +1,19 @@
+"""Gunicorn configuration: gunicorn -c gunicorn.conf.py run:app
+
+Requests spend most of their time waiting on Gemini, the research agent and
+Firestore, so each worker serves them from a pool of threads instead of one
+request at a time: the GIL is released while a thread waits on the network,
+and one process holds hundreds of in-flight LLM calls. Set
+GUNICORN_WORKER_CLASS=sync to compare with one request per worker.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5001)}"
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 100))
+
+# Exam creation and research wait on the LLM for minutes
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 600))
+graceful_timeout = 30
+keepalive = 5
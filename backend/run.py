@@ -1,6 +1,14 @@
 from app import create_app
+from app.services.exam_expiry_service import ExamExpiryService
+from app.services.exam_timer_service import exam_timer
 
 app = create_app()
 
+# Expire stale exams in the background
+ExamExpiryService.start()
+
+# Auto-submit exams whose time is over
+exam_timer.start()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0')
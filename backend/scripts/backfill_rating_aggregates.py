@@ -0,0 +1,49 @@
+"""Store rating_sum, rating_count and avg_rating on questions saved before they existed
+
+Usage (from the backend directory):
+    python -m scripts.backfill_rating_aggregates [--dry-run]
+"""
+import argparse
+import time
+from datetime import datetime
+
+from app.models.question import Question
+from app.services.firebase_service import FirebaseService
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="count the questions without writing")
+    args = parser.parse_args()
+    
+    from app import create_app
+    create_app()
+    
+    start = time.perf_counter()
+    db = FirebaseService.get_db()
+    batch = db.batch()
+    pending = updated = 0
+    
+    for doc in db.collection("questions").select(["ratings", "rating_count"]).stream():
+        data = doc.to_dict()
+        if data.get("rating_count") is not None:
+            continue
+        question = Question.from_dict({"ratings": data.get("ratings") or []})
+        updated += 1
+        if args.dry_run:
+            continue
+        batch.update(doc.reference, {
+            "rating_sum": question.rating_sum,
+            "rating_count": question.rating_count,
+            "avg_rating": question.avg_rating,
+            "updated_at": datetime.utcnow()
+        })
+        pending += 1
+        # Firestore batches are limited to 500 writes
+        if pending == 500:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    
+    if pending:
+        batch.commit()
+    print(f"{'Found' if args.dry_run else 'Updated'} {updated:,} questions in {time.perf_counter() - start:.1f}s")
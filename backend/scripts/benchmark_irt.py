@@ -0,0 +1,53 @@
+"""Benchmark TRI (3PL) ability estimation for single and batch scoring
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_irt [--students 10000] [--items 45]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.irt_service import IRTService
+
+def simulate(students, items, seed=42):
+    """Simulate item parameters and 3PL response patterns"""
+    rng = np.random.default_rng(seed)
+    a = rng.lognormal(0.0, 0.3, items)
+    b = rng.normal(0.0, 1.0, items)
+    c = rng.uniform(0.1, 0.25, items)
+    theta = rng.normal(0.0, 1.0, students)
+    p = IRTService.probabilities(a, b, c, theta)
+    responses = (rng.random(p.shape) < p).astype(np.int8)
+    return a, b, c, theta, responses
+
+def benchmark(students, items, method):
+    """Time single and batch scoring, and check the estimates recover theta"""
+    a, b, c, theta, responses = simulate(students, items)
+    
+    # Single scoring, one submission at a time like submit_exam
+    singles = min(students, 2000)
+    start = time.perf_counter()
+    for i in range(singles):
+        IRTService.estimate_abilities(responses[i:i + 1], a, b, c, method=method)
+    single_elapsed = time.perf_counter() - start
+    
+    # Batch scoring, every submission in one call like a re-score job
+    start = time.perf_counter()
+    estimates, _ = IRTService.estimate_abilities(responses, a, b, c, method=method)
+    batch_elapsed = time.perf_counter() - start
+    
+    correlation = np.corrcoef(theta, estimates)[0, 1]
+    print(f"{method.upper()} | {items} items")
+    print(f"  single: {singles / single_elapsed:,.0f} submissions/s ({single_elapsed / singles * 1e6:.0f} us each)")
+    print(f"  batch:  {students / batch_elapsed:,.0f} submissions/s ({students:,} in {batch_elapsed * 1000:.1f} ms)")
+    print(f"  correlation with true ability: {correlation:.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--items", type=int, default=45)
+    args = parser.parse_args()
+    
+    for method in ("eap", "mle"):
+        benchmark(args.students, args.items, method)
@@ -0,0 +1,145 @@
+"""Benchmark model decoding and memory on synthetic Firestore documents
+
+Reports decode throughput and memory per object of the slotted models, and
+compares Question with its previous dict-backed, keyword __init__ version.
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_models [--documents 100000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+from app.models.exam import Exam
+from app.models.flashcard import Flashcard
+from app.models.question import Question
+from app.models.research import Research
+
+def question_document(i):
+    return {
+        "id": f"q_{i:08x}",
+        "text": f"Enunciado da questão {i}",
+        "options": [{"id": letter, "text": f"Alternativa {letter}"} for letter in "abcde"],
+        "correct_answer": "abcde"[i % 5],
+        "explanation": "Explicação",
+        "subject": "mathematics",
+        "user_id": f"user_{i % 1000}",
+        "topic": "Funções",
+        "difficulty": "medium",
+        "ratings": [],
+        "possible_questions": [],
+        "prepared_answers": [],
+        "irt": {"a": 1.0, "b": 0.0, "c": 0.2, "responses": 0},
+        "updated_at": datetime.utcnow(),
+        "source": None,
+        "rating_sum": i % 20,
+        "rating_count": i % 5,
+        "avg_rating": None
+    }
+
+def flashcard_document(i):
+    now = datetime.utcnow()
+    return {
+        "id": f"fc_{i:08x}", "user_id": f"user_{i % 1000}", "front": "Frente", "back": "Verso",
+        "tags": ["enem"], "created_at": now, "ease_factor": 2.5, "interval": 1, "repetitions": 1,
+        "next_review": now, "last_review": now, "media_attachments": [], "user_notes": "", "question_id": None
+    }
+
+def research_document(i):
+    return {
+        "id": f"rs_{i:08x}", "user_id": f"user_{i % 1000}", "topic": "Revolução Industrial",
+        "content": "Conteúdo", "flashcards": [], "created_at": datetime.utcnow()
+    }
+
+def exam_document(i):
+    exam = Exam(f"user_{i % 1000}", "quick", 10, 30, {"method": "subject", "subject": "mathematics"},
+                id=f"exam_{i:08x}", question_ids=[f"q_{j:08x}" for j in range(10)])
+    return exam.to_dict()
+
+class LegacyQuestion:
+    """The question model as it decoded before: dict-backed, through __init__"""
+    
+    def __init__(self, text, options, correct_answer, explanation, subject,
+                 user_id, topic=None, difficulty=None, id=None, ratings=None, possible_questions=None,
+                 prepared_answers=None, irt=None, updated_at=None, source=None,
+                 rating_sum=None, rating_count=None):
+        self.id = id or f"q_{uuid.uuid4().hex[:8]}"
+        self.text = text
+        self.options = options
+        self.correct_answer = correct_answer
+        self.explanation = explanation
+        self.subject = subject
+        self.user_id = user_id
+        self.topic = topic or ""
+        self.difficulty = difficulty or "medium"
+        self.ratings = ratings or []
+        self.possible_questions = possible_questions or []
+        self.prepared_answers = prepared_answers or []
+        self.irt = irt
+        self.updated_at = updated_at
+        self.source = source
+        if rating_count is None:
+            rating_sum = sum(r.get("rating", 0) for r in self.ratings)
+            rating_count = len(self.ratings)
+        self.rating_sum = rating_sum
+        self.rating_count = rating_count
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            id=data.get("id"),
+            text=data.get("text"),
+            options=data.get("options", []),
+            correct_answer=data.get("correct_answer"),
+            explanation=data.get("explanation"),
+            subject=data.get("subject"),
+            user_id=data.get("user_id"),
+            topic=data.get("topic"),
+            difficulty=data.get("difficulty"),
+            ratings=data.get("ratings", []),
+            possible_questions=data.get("possible_questions", []),
+            prepared_answers=data.get("prepared_answers", []),
+            irt=data.get("irt"),
+            updated_at=data.get("updated_at"),
+            source=data.get("source"),
+            rating_sum=data.get("rating_sum"),
+            rating_count=data.get("rating_count")
+        )
+
+def measure(label, decode, documents):
+    """Decode every document, reporting throughput and memory per object"""
+    gc.collect()
+    start = time.perf_counter()
+    objects = [decode(document) for document in documents]
+    elapsed = time.perf_counter() - start
+    del objects
+    
+    gc.collect()
+    tracemalloc.start()
+    objects = [decode(document) for document in documents]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    
+    print(f"  {label:<28} {len(documents) / elapsed:>12,.0f} docs/s {size / len(documents):>8,.0f} bytes/object")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=100_000)
+    args = parser.parse_args()
+    
+    for name, model, build in (
+        ("Question", Question, question_document),
+        ("Flashcard", Flashcard, flashcard_document),
+        ("Research", Research, research_document),
+        ("Exam", Exam, exam_document)
+    ):
+        documents = [build(i) for i in range(args.documents)]
+        print(f"{name} ({args.documents:,} documents)")
+        measure("slotted from_dict", model.from_dict, documents)
+        if model is Question:
+            measure("previous dict-backed model", LegacyQuestion.from_dict, documents)
+        measure("to_dict", lambda document: model.from_dict(document).to_dict(), documents[:args.documents // 10])
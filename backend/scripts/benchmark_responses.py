@@ -0,0 +1,92 @@
+"""Benchmark API response serialisation on realistic exam payloads
+
+Times GET /exams/<id> style responses (30 questions with long explanations)
+through Flask's default stdlib encoder, the previous path, against the
+FastJSONProvider of app/utils/response.py with and without cached question
+fragments.
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_responses [--questions 30] [--iterations 2000]
+"""
+import argparse
+import time
+
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from app.models.exam import Exam
+from app.models.question import Question
+from app.utils.response import FastJSONProvider, JSONFragmentCache, orjson
+
+EXPLANATION = ("A alternativa correta decorre da análise do enunciado: a função descrita é afim, "
+               "logo sua taxa de variação é constante e igual à razão entre as variações. ") * 6
+
+def build_exam(question_count):
+    """A completed exam and its questions, as loaded by GET /exams/<id>"""
+    questions = [
+        Question(
+            text=f"Questão {i}: considere o gráfico e o texto apresentados. " * 4,
+            options=[{"id": letter, "text": f"Alternativa {letter} da questão {i}"} for letter in "abcde"],
+            correct_answer="abcde"[i % 5],
+            explanation=EXPLANATION,
+            subject="mathematics",
+            user_id="user_0",
+            topic="Funções",
+            possible_questions=["Por que não a alternativa B?", "Como interpretar o gráfico?"],
+            rating_sum=i % 20,
+            rating_count=i % 5
+        )
+        for i in range(question_count)
+    ]
+    exam = Exam("user_0", "complete", question_count, 180, {"method": "subject", "subject": "mathematics"},
+                question_ids=[question.id for question in questions])
+    exam.status = "completed"
+    return exam, questions
+
+def previous_payload(exam, questions):
+    """The exam response as routes built it before: datetimes formatted by hand"""
+    response = exam.to_response_dict(questions=questions)
+    response["createdAt"] = exam.created_at.isoformat() + "Z"
+    response["expiresAt"] = exam.expires_at.isoformat() + "Z"
+    return {"success": True, "exam": response}
+
+def measure(label, app, build, iterations):
+    """Serialise build() iterations times, reporting responses/s and body size"""
+    with app.app_context():
+        size = len(jsonify(build()).get_data())
+        start = time.perf_counter()
+        for _ in range(iterations):
+            jsonify(build()).get_data()
+        elapsed = time.perf_counter() - start
+    print(f"  {label:<40} {iterations / elapsed:>10,.0f} responses/s {elapsed / iterations * 1e6:>8,.0f} us {size:>8,} bytes")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    
+    exam, questions = build_exam(args.questions)
+    
+    default_app = Flask("default")
+    default_app.json = DefaultJSONProvider(default_app)
+    fast_app = Flask("fast")
+    fast_app.json = FastJSONProvider(fast_app)
+    fragments = JSONFragmentCache()
+    
+    def fast_payload():
+        return {"success": True, "exam": exam.to_response_dict(questions=questions)}
+    
+    def fragment_payload():
+        response = exam.to_response_dict(include_questions=False)
+        response["questions"] = [
+            fragments.get(("question", question.id, question.version), question.to_response_dict)
+            for question in questions
+        ]
+        return {"success": True, "exam": response}
+    
+    print(f"Exam with {args.questions} questions, {args.iterations:,} iterations "
+          f"(backend: {'orjson' if orjson else 'stdlib json'})")
+    measure("previous: jsonify, stdlib encoder", default_app, lambda: previous_payload(exam, questions), args.iterations)
+    measure("FastJSONProvider", fast_app, fast_payload, args.iterations)
+    measure("FastJSONProvider, cached question bytes", fast_app, fragment_payload, args.iterations)
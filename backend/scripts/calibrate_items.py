@@ -0,0 +1,68 @@
+"""Calibrate IRT item parameters from the accumulated exam results
+
+Usage (from the backend directory):
+    python -m scripts.calibrate_items [--model 3pl] [--min-responses 50] [--dry-run]
+    python -m scripts.calibrate_items --synthetic 300000   # benchmark on simulated data
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.calibration_service import CalibrationService, ResponseMatrix
+from app.services.irt_service import IRTService
+
+def simulate(responses, items=300, items_per_exam=30, seed=42):
+    """Simulate a ResponseMatrix of about `responses` 3PL responses"""
+    rng = np.random.default_rng(seed)
+    users = max(responses // items_per_exam, 1)
+    a = rng.lognormal(0.0, 0.3, items)
+    b = rng.normal(0.0, 1.0, items)
+    c = rng.uniform(0.1, 0.25, items)
+    theta = rng.normal(0.0, 1.0, users)
+    
+    # Every user answers a random subset of the items
+    cols = np.argsort(rng.random((users, items)), axis=1)[:, :items_per_exam]
+    rows = np.repeat(np.arange(users), items_per_exam)
+    cols = cols.ravel()
+    p = c[cols] + (1 - c[cols]) / (1 + np.exp(-a[cols] * (theta[rows] - b[cols])))
+    values = (rng.random(len(p)) < p).astype(np.int8)
+    
+    matrix = ResponseMatrix(rows, cols, values, list(range(users)), list(range(items)))
+    return matrix, (a, b, c)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", choices=["2pl", "3pl"], default="3pl")
+    parser.add_argument("--min-responses", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    parser.add_argument("--dry-run", action="store_true", help="fit without writing to Firestore")
+    parser.add_argument("--synthetic", type=int, metavar="RESPONSES",
+                        help="calibrate simulated responses instead of Firestore data")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    if args.synthetic:
+        matrix, truth = simulate(args.synthetic)
+    else:
+        from app import create_app
+        create_app()
+        matrix, truth = CalibrationService.load_responses(), None
+    users, items = matrix.shape
+    print(f"Loaded {len(matrix):,} responses ({users:,} users x {items:,} items) "
+          f"in {time.perf_counter() - start:.1f}s")
+    
+    start = time.perf_counter()
+    parameters = CalibrationService.fit(matrix, args.model, chunk_size=args.chunk_size, verbose=True)
+    elapsed = time.perf_counter() - start
+    print(f"Fitted {args.model.upper()} in {elapsed:.1f}s ({parameters['iterations']} EM iterations, "
+          f"{len(matrix) * parameters['iterations'] / elapsed:,.0f} responses/s)")
+    
+    if truth:
+        names = "abc" if args.model == "3pl" else "ab"
+        for name, estimated, true in zip(names, (parameters["a"], parameters["b"], parameters["c"]), truth):
+            rmse = np.sqrt(np.mean((estimated - true) ** 2))
+            print(f"  {name}: RMSE {rmse:.3f}, correlation {np.corrcoef(estimated, true)[0, 1]:.3f}")
+    elif not args.dry_run:
+        updated = CalibrationService.save_item_parameters(matrix, parameters, args.min_responses)
+        print(f"Updated {updated:,} questions")
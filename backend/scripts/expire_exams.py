@@ -0,0 +1,27 @@
+"""Expire the exams past their expires_at once (the API also runs this in the background)
+
+Usage (from the backend directory):
+    python -m scripts.expire_exams [--orphan-questions keep|archive|delete] [--max-pages 50]
+"""
+import argparse
+import time
+
+from app.services.exam_expiry_service import ExamExpiryService
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orphan-questions", choices=["keep", "archive", "delete"], default="keep",
+                        help="what to do with questions only used by expired exams")
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--max-pages", type=int, default=50)
+    parser.add_argument("--page-delay", type=float, default=1.0, help="seconds to wait between pages")
+    args = parser.parse_args()
+    
+    from app import create_app
+    create_app()
+    
+    start = time.perf_counter()
+    result = ExamExpiryService.sweep(page_size=args.page_size, max_pages=args.max_pages,
+                                     page_delay=args.page_delay, orphan_questions=args.orphan_questions)
+    print(f"Expired {result['expired']:,} exams and removed {result['questionsRemoved']:,} questions "
+          f"in {time.perf_counter() - start:.1f}s")
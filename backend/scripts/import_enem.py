@@ -0,0 +1,53 @@
+"""Import official ENEM items (INEP open data) into the question bank
+
+Usage (from the backend directory):
+    python -m scripts.import_enem --year 2022 --items ITENS_PROVA_2022.csv \\
+        --content conteudo_2022.csv [--microdata MICRODADOS_ENEM_2022.csv] \\
+        [--checkpoint import_2022.json] [--workers 4] [--dry-run]
+
+Re-running with the same --checkpoint resumes an interrupted import.
+"""
+import argparse
+import time
+
+from app.services.enem_import_service import EnemImportService, ImportCheckpoint
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--items", required=True, help="ITENS_PROVA_<year>.csv")
+    parser.add_argument("--content", required=True, help="CSV with CO_ITEM, TX_ENUNCIADO, TX_ALTERNATIVA_A..E")
+    parser.add_argument("--microdata", help="MICRODADOS_ENEM_<year>.csv, for the proportion correct of each item")
+    parser.add_argument("--checkpoint", help="JSON file used to resume an interrupted import")
+    parser.add_argument("--workers", type=int, default=4, help="parallel Firestore batch writers")
+    parser.add_argument("--dry-run", action="store_true", help="map the items without writing to Firestore")
+    args = parser.parse_args()
+    
+    checkpoint = ImportCheckpoint(args.checkpoint)
+    
+    start = time.perf_counter()
+    items, booklets = EnemImportService.load_items(args.items)
+    content = EnemImportService.load_content(args.content)
+    print(f"Loaded {len(items):,} items and {len(content):,} statements in {time.perf_counter() - start:.1f}s")
+    
+    counts = {}
+    if args.microdata:
+        counts = EnemImportService.aggregate_microdata(args.microdata, booklets, checkpoint)
+    
+    # Sorted so the checkpoint offsets stay valid across runs
+    item_ids = sorted(item_id for item_id in items if item_id in content)
+    skipped = len(items) - len(item_ids)
+    if skipped:
+        print(f"Skipping {skipped:,} items without content")
+    
+    question_dicts = (
+        EnemImportService.to_question_dict(items[item_id], content[item_id], args.year, counts.get(item_id))
+        for item_id in item_ids
+    )
+    
+    if args.dry_run:
+        print(f"Mapped {sum(1 for _ in question_dicts):,} questions (dry run)")
+    else:
+        from app import create_app
+        create_app()
+        EnemImportService.write_questions(question_dicts, checkpoint, workers=args.workers)
@@ -0,0 +1,82 @@
+"""Load test an endpoint with concurrent clients and report served concurrency
+
+Sends --requests requests from --concurrency client threads and reports
+throughput, latency percentiles and the effective concurrency: the total
+time spent in requests divided by the wall time (Little's law). With LLM-bound
+endpoints the latter shows how many calls the server keeps in flight at once.
+For example, compare one request per worker with the threaded workers of
+gunicorn.conf.py:
+
+    GUNICORN_WORKER_CLASS=sync gunicorn -c gunicorn.conf.py run:app
+    gunicorn -c gunicorn.conf.py run:app
+
+Usage (from the backend directory):
+    python -m scripts.load_test --url http://localhost:5001/v1/questions/<id>/chat/start \\
+        --token <firebase id token> --method POST --body '{"query": "Por que a alternativa A?"}' \\
+        [--concurrency 50] [--requests 200]
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+def run(url, token, method, body, concurrency, total, timeout):
+    """Send the requests, returning (latencies of successes, errors by status, wall time)"""
+    local = threading.local()
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    latencies, errors = [], {}
+    lock = threading.Lock()
+    
+    def send(_):
+        # One connection pool per client thread
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = local.session.request(method, url, json=body, headers=headers, timeout=timeout)
+            status = response.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        latency = time.perf_counter() - start
+        with lock:
+            if isinstance(status, int) and status < 400:
+                latencies.append(latency)
+            else:
+                errors[status] = errors.get(status, 0) + 1
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, range(total)))
+    return latencies, errors, time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--token", help="Firebase ID token sent as Bearer token")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--body", help="JSON request body")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+    
+    latencies, errors, elapsed = run(
+        args.url, args.token, args.method.upper(), json.loads(args.body) if args.body else None,
+        args.concurrency, args.requests, args.timeout
+    )
+    
+    print(f"{args.method.upper()} {args.url}: {args.requests} requests, {args.concurrency} clients")
+    print(f"  succeeded             {len(latencies)}")
+    print(f"  failed                {sum(errors.values())} {errors if errors else ''}")
+    print(f"  wall time             {elapsed:.1f} s")
+    print(f"  throughput            {len(latencies) / elapsed:.2f} requests/s")
+    print(f"  latency p50/p95/max   {percentile(latencies, 0.5):.2f} / {percentile(latencies, 0.95):.2f} / "
+          f"{max(latencies, default=0):.2f} s")
+    print(f"  effective concurrency {sum(latencies) / elapsed:.1f} requests in flight")
@@ -0,0 +1,68 @@
+"""Move the legacy ratings lists of questions to question_ratings and the rating counter shards
+
+Run once before deploying sharded ratings. Questions already migrated have an
+empty ratings list and are skipped, so the script can be re-run safely.
+
+Usage (from the backend directory):
+    python -m scripts.migrate_ratings [--dry-run]
+"""
+import argparse
+import time
+from datetime import datetime
+
+from app.services.firebase_service import FirebaseService
+
+# Legacy totals go to their own shard, so re-running never double counts
+LEGACY_SHARD = "legacy"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="count the ratings without writing")
+    args = parser.parse_args()
+    
+    from app import create_app
+    create_app()
+    
+    start = time.perf_counter()
+    db = FirebaseService.get_db()
+    questions = ratings = 0
+    
+    for doc in db.collection("questions").select(["ratings"]).stream():
+        legacy = doc.to_dict().get("ratings") or []
+        if not legacy:
+            continue
+        questions += 1
+        ratings += len(legacy)
+        if args.dry_run:
+            continue
+        
+        operations = [
+            (db.collection("question_ratings").document(f"{doc.id}_{r.get('user_id')}"), {
+                "question_id": doc.id,
+                "user_id": r.get("user_id"),
+                "rating": r.get("rating", 0),
+                "timestamp": r.get("timestamp") or datetime.utcnow()
+            })
+            for r in legacy
+        ]
+        rating_sum = sum(r.get("rating", 0) for r in legacy)
+        operations.append((doc.reference.collection("rating_shards").document(LEGACY_SHARD),
+                           {"sum": rating_sum, "count": len(legacy)}))
+        
+        # Firestore batches are limited to 500 writes; the ratings list is cleared last
+        for i in range(0, len(operations), 499):
+            batch = db.batch()
+            for ref, data in operations[i:i + 499]:
+                batch.set(ref, data)
+            if i + 499 >= len(operations):
+                batch.update(doc.reference, {
+                    "ratings": [],
+                    "rating_sum": rating_sum,
+                    "rating_count": len(legacy),
+                    "avg_rating": rating_sum / len(legacy),
+                    "updated_at": datetime.utcnow()
+                })
+            batch.commit()
+    
+    print(f"{'Found' if args.dry_run else 'Migrated'} {ratings:,} ratings of {questions:,} questions "
+          f"in {time.perf_counter() - start:.1f}s")
@@ -124,7 +124,7 @@ const ResearchDetail: React.FC = () => {
           <div className="research-content-wrapper">
             <div 
               className="research-content"
-              dangerouslySetInnerHTML={renderHtmlContent(research.content)}
+              dangerouslySetInnerHTML={renderHtmlContent(research.content || '')}
             />
           </div>
           
@@ -94,7 +94,7 @@ const ResearchList: React.FC = () => {
               </div>
               <h3 className="research-card-title">{research.topic}</h3>
               <p className="research-card-preview">
-                {getContentPreview(research.content)}
+                {research.preview ?? getContentPreview(research.content || '')}
               </p>
               <div className="research-card-footer">
                 <button className="research-card-button">
@@ -3,10 +3,12 @@ import { getAuth } from 'firebase/auth';
 export interface ResearchContent {
   id: string;
   topic: string;
-  content: string;
+  content?: string;
+  preview?: string;
   createdAt: string;
   userId: string;
-  flashcards: Flashcard[];
+  flashcards?: Flashcard[];
+  flashcardCount?: number;
 }
 
 export interface Flashcard {